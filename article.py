@@ -1,77 +1,318 @@
 import xml.etree.ElementTree as ElementTree
-import warnings
-from countries import countries
+import datetime
+import json
 import re
+import warnings
+import zlib
+from collections import Counter
+from countries import find_country, geotag
+import itertools
+import time
+
+
+class ParseStats(object):
+    """
+    Opt-in profile of article parsing
+
+    Give one to `Article` or to `pubmedpy.iter_articles` to record:
+
+    - `times`: wall time per stage, in seconds. `tokenize` is the xml parsing of
+      the article (`iter_articles` only), `front` and `body` the building of
+      those parts, and `affiliation` and `table` the parsing of every `<aff>` and
+      `<table>`, which is also counted in `front` and `body` respectively
+    - `tags`: number of elements per tag
+    - `warnings`: number of warnings per tag
+    - `nbytes`: bytes read from the decompressed input (`iter_articles` only)
+    - `articles`: number of articles
+
+    `iter_articles` calls `callback(article, stats)` for every article, with the
+    `ParseStats` of that article alone, e.g. to log pathological documents. Parts
+    of a lazy article built after it has been yielded are not recorded. The
+    parser reads its input in blocks of many KB, so `nbytes` is only counted in
+    the total stats: it is always 0 in the stats of one article. Use its `tags`
+    to find the largest articles.
+
+    Without a `ParseStats` nothing is measured and parsing runs uninstrumented.
+    """
+    __slots__ = ('times', 'tags', 'warnings', 'nbytes', 'articles', 'callback')
+
+    def __init__(self, callback=None):
+        self.times = {}
+        self.tags = Counter()
+        self.warnings = Counter()
+        self.nbytes = 0
+        self.articles = 0
+        self.callback = callback
+
+    def __repr__(self):
+        return "ParseStats(articles={}, nbytes={}, times={})".format(
+            self.articles, self.nbytes, {stage: round(t, 6) for stage, t in self.times.items()})
+
+    def add_time(self, stage, seconds):
+        self.times[stage] = self.times.get(stage, 0.) + seconds
+
+    def update(self, other):
+        """
+        Add the counters of another `ParseStats` to this one
+        """
+        for stage, seconds in other.times.items():
+            self.add_time(stage, seconds)
+        self.tags.update(other.tags)
+        self.warnings.update(other.warnings)
+        self.nbytes += other.nbytes
+        self.articles += other.articles
+
+    def todict(self):
+        return {
+            "articles": self.articles,
+            "nbytes": self.nbytes,
+            "times": dict(self.times),
+            "tags": dict(self.tags),
+            "warnings": dict(self.warnings),
+        }
+
+
+def _as_sections(sections):
+    """
+    Section selector as a tuple of exact titles and compiled patterns, `None` selecting every section
+
+    :param sections: a title or compiled pattern, or a collection of them
+    """
+    if sections is None:
+        return None
+    if isinstance(sections, str) or hasattr(sections, "search"):
+        return (sections,)
+    return tuple(sections)
+
+
+def _selects(sections, title):
+    """
+    :param sections: selector normalized by `_as_sections`
+    :return: whether the section titled `title` is selected: its title is one of the
+        strings, or one of the patterns is found in it
+    """
+    if sections is None:
+        return True
+    if title is None:
+        return False
+    return any(title == s if isinstance(s, str) else s.search(title) is not None for s in sections)
+
+
+class ParseContext(object):
+    """
+    State shared by the nodes of one article while it is being built
+
+    Paragraphs and tables are numbered per article, in document order, through
+    the context rather than through class-level counters, so articles parsed
+    concurrently in threads get the same titles as when parsed one at a time.
+    `stats` is the optional `ParseStats` of the article and `sections` the
+    optional titles and patterns of the sections to build (see `Article`).
+    """
+    __slots__ = ('stats', 'paragraphs', 'tables', 'sections')
+
+    def __init__(self, stats=None, sections=None):
+        self.stats = stats
+        self.paragraphs = 0
+        self.tables = 0
+        self.sections = _as_sections(sections)
+
+    def selects(self, title):
+        """
+        :return: whether the top-level section titled `title` is built
+        """
+        return _selects(self.sections, title)
+
+    def next_paragraph(self):
+        self.paragraphs += 1
+        return self.paragraphs
+
+    def next_table(self):
+        self.tables += 1
+        return self.tables
+
+    def timed(self, stage, func, *args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.stats.add_time(stage, time.perf_counter() - start)
+
+    def warn(self, tag, message):
+        warnings.warn(message)
+        if self.stats is not None:
+            self.stats.warnings[tag] += 1
+
+
+class ArticleFilter(object):
+    """
+    Selection of articles decided from the `<article>` attributes and `<front>` alone
+
+    Give one to `pubmedpy.iter_articles` as `where` so that rejected articles
+    are dropped before their body is built. Every criterion given must match:
+
+    - `type`: `article-type` attribute
+    - `journal`: any of the `<journal-id>` of the journal
+    - `pmcid`: PMC id, with or without its `PMC` prefix
+    - `since` and `until`: bounds, both included, of the publication date, the
+      first `<pub-date>` of `<article-meta>` that is not the PMC release date.
+      Bounds are `datetime.date` objects or years. Missing months and days of
+      publication dates count as the first, and articles without one never match
+
+    `type`, `journal` and `pmcid` take one value or a collection of values.
+    """
+    __slots__ = ('types', 'journals', 'pmcids', 'since', 'until')
+
+    def __init__(self, type=None, journal=None, pmcid=None, since=None, until=None):
+        self.types = _as_set(type)
+        self.journals = _as_set(journal)
+        self.pmcids = None if pmcid is None else {_pmcid(p) for p in _as_set(pmcid)}
+        self.since = datetime.date(since, 1, 1) if isinstance(since, int) else since
+        self.until = datetime.date(until, 12, 31) if isinstance(until, int) else until
+
+    def __repr__(self):
+        return "ArticleFilter(types={}, journals={}, pmcids={}, since={}, until={})".format(
+            self.types, self.journals, self.pmcids, self.since, self.until)
+
+    def match(self, elem):
+        """
+        :param elem: `<article>` element
+        :return: whether the article is selected
+        """
+        return self.match_type(elem.get("article-type")) and self.match_front(elem.find("front"))
+
+    def match_type(self, type):
+        return self.types is None or type in self.types
+
+    def match_front(self, front):
+        """
+        :param front: `<front>` element, or None when the article has none
+        :return: whether the front matter is selected, ignoring the article type
+        """
+        if self.journals is None and self.pmcids is None and self.since is None and self.until is None:
+            return True
+        if front is None:
+            return False
+
+        if self.journals is not None:
+            if not any((jid.text or '').strip() in self.journals for jid in front.iterfind("journal-meta/journal-id")):
+                return False
+
+        meta = front.find("article-meta")
+        if meta is None:
+            return False
+        if self.pmcids is not None:
+            pmcid = meta.find("article-id[@pub-id-type='pmcid']")
+            if pmcid is None or _pmcid(pmcid.text or '') not in self.pmcids:
+                return False
+        if self.since is not None or self.until is not None:
+            date = _pub_date(meta)
+            if date is None or (self.since is not None and date < self.since) or \
+                    (self.until is not None and date > self.until):
+                return False
+        return True
+
+
+def _as_set(values):
+    if values is None:
+        return None
+    return {values} if isinstance(values, str) else set(values)
+
+
+def _pmcid(pmcid):
+    pmcid = str(pmcid).strip().upper()
+    return pmcid[3:] if pmcid.startswith("PMC") else pmcid
+
+
+def _pub_date(meta):
+    """
+    Publication date of an `<article-meta>`, see `ArticleFilter`
+    """
+    for pub_date in meta.iterfind("pub-date"):
+        if "pmc-release" in (pub_date.get("pub-type"), pub_date.get("date-type")):
+            continue
+        parts = []
+        for tag in ("year", "month", "day"):
+            part = pub_date.find(tag)
+            try:
+                parts.append(int(part.text))
+            except (AttributeError, TypeError, ValueError):
+                break
+        # an invalid day or month falls back to a coarser date
+        for n in range(len(parts), 0, -1):
+            try:
+                return datetime.date(*(parts[:n] + [1] * (3 - n)))
+            except ValueError:
+                pass
+    return None
+
 
 class BaseElement(object):
+    """
+    Base of every node of the parsed document tree
+
+    Nodes declare `__slots__` and keep their dispatch tables at class level, so a
+    node costs little more than the attributes it parses. `xml` is the source
+    element the node was parsed from; `release()` drops it from the whole subtree
+    once it is no longer needed.
+    """
+    __slots__ = ('xml',)
+
     def __init__(self, stub):
         self.xml = stub
-        self.graph = None
-        self.set_graph()
 
-    def set_graph(self):
-        graph = []
+    @property
+    def graph(self):
         if self.xml:
-            for i, elem in enumerate(list(self.xml), 1):
-                graph.append((self.xml.tag, elem.tag))
-            self.graph = graph
+            return [(self.xml.tag, elem.tag) for elem in self.xml]
 
+    def release(self):
+        """
+        Drop the reference to the source xml element of this node and of its children
+        """
+        self.xml = None
+        for child in self._children():
+            if isinstance(child, BaseElement):
+                child.release()
+
+    def _children(self):
+        return []
 
 
 class BaseBodyElement(BaseElement):
+    __slots__ = ('label', 'caption', 'title')
+
+    # TODO: add support for tags
+    unspported_tags = frozenset({"ref-list", "def-list", "verse-group", "array", 'inline-formula', 'email'})
+    emphasis_elements = frozenset({'bold', 'italic', 'monospace', 'overline',
+                                   'roman', 'sans-serif', 'sc', 'strike', 'underline', 'sup', 'sub'})
+
+    # tag -> node class, filled in once every class is defined (see bottom of module)
+    html_classes = {}
+
     def __init__(self, stub):
         super(BaseBodyElement, self).__init__(stub)
         self.label = None
         self.caption = None
         self.title = None
 
-        # TODO: add support for tags
-        self.unspported_tags = {"ref-list", "def-list", "verse-group", "array", 'inline-formula', 'email'}
-        self.emphasis_elements = {'bold', 'italic', 'monospace', 'overline',
-                                  'roman', 'sans-serif', 'sc', 'strike', 'underline', 'sup', 'sub'}
-
-        self.html_classes = {
-            "sec": Section,
-            "p": Paragraph,
-            "fig": Figure,
-            "graphic": ReferencedContent,
-            "media": ReferencedContent,
-            "disp-formula": ReferencedContent,
-            "table": Table,
-            "table-wrap": TableWrap,
-            "table-wrap-group": TableGroup,
-            "supplementary-material": NestedContainer,
-            "boxed-text": SeparatedContent,
-            'named-content': SeparatedContent,
-            'speech': SeparatedContent,
-            'speaker': Name,
-            "list": List,
-            'xref': ReferencedContent,
-            'ext-link': ReferencedContent,
-            'inline-graphic': ReferencedContent,
-            'disp-quotsing alle': NestedContainer,
-            'statement': NestedContainer,
-            'related-article': Front
-        }
-
     def name(self):
         return self.__class__.__name__
 
     def set_descriptive_attributes(self, stub):
-        label = stub.find("label")
-        if label is not None:
-            self.label = label.text
-            stub.remove(label)
-
-        caption = stub.find("caption")
-        if caption is not None:
-            self.caption = "".join(caption.itertext())
-            stub.remove(caption)
-
-        title = stub.find("title")
+        elems = [stub.find(tag) for tag in ("label", "caption", "title")]
+        for elem in elems:
+            if elem is not None:
+                stub.remove(elem)
+        self.describe(*_descriptive_texts(*elems))
+
+    def describe(self, label, caption, title):
+        """
+        Set label, caption and the title made of them, from the text of the `<label>`, `<caption>` and `<title>`
+        """
+        self.label = label
+        self.caption = caption
         if title is not None:
-            self.title = "".join(title.itertext())
-            stub.remove(title)
+            self.title = title
 
         if self.title is None:
             self.title = ""
@@ -83,8 +324,16 @@ class BaseBodyElement(BaseElement):
             self.title = self.name()
 
 
+def _descriptive_texts(label, caption, title):
+    return (label.text if label is not None else None,
+            "".join(caption.itertext()) if caption is not None else None,
+            "".join(title.itertext()) if title is not None else None)
+
+
 class List(BaseBodyElement):
-    def __init__(self, stub=None):
+    __slots__ = ('elements',)
+
+    def __init__(self, stub=None, ctx=None):
         super(List, self).__init__(stub)
         self.elements = None
         self.title = None
@@ -115,6 +364,8 @@ class List(BaseBodyElement):
 
 
 class Text(object):
+    __slots__ = ('text', 'title')
+
     def __init__(self, text, title=None):
         self.text = text
         self.title = title if title is not None else self.name()
@@ -134,12 +385,14 @@ class Text(object):
 
 
 class NestedContainer(BaseBodyElement):
-    def __init__(self, stub=None):
+    __slots__ = ('content',)
+
+    def __init__(self, stub=None, ctx=None):
         super(NestedContainer, self).__init__(stub)
         self.content = None
 
         if stub is not None:
-            self.parse(stub)
+            self.parse(stub, ctx)
 
     def name(self):
         return self.__class__.__name__
@@ -152,7 +405,11 @@ class NestedContainer(BaseBodyElement):
             for ele in self.content:
                 yield ele
 
-    def parse(self, stub):
+    def _children(self):
+        return self.content or []
+
+    def parse(self, stub, ctx=None):
+        ctx = ctx if ctx is not None else ParseContext()
         self.set_descriptive_attributes(stub)
 
         self.content = []
@@ -163,10 +420,10 @@ class NestedContainer(BaseBodyElement):
             if ele.tag in self.emphasis_elements:
                 self.content.append(Text(ele.text))
             elif ele.tag not in self.unspported_tags:
-                self.content.append(self.html_classes[ele.tag](ele))
+                self.content.append(self.html_classes[ele.tag](ele, ctx=ctx))
             else:
                 # print(ele.tag, ElementTree.tostring(ele))
-                warnings.warn('{} is not supported'.format(ele.tag))
+                ctx.warn(ele.tag, '{} is not supported'.format(ele.tag))
 
             if ele.tail:
                 self.content.append(Text(ele.tail))
@@ -185,12 +442,16 @@ class NestedContainer(BaseBodyElement):
 
 
 class SeparatedContent(NestedContainer):
-    def __init__(self, stub):
-        super(SeparatedContent, self).__init__(stub)
+    __slots__ = ()
+
+    def __init__(self, stub, ctx=None):
+        super(SeparatedContent, self).__init__(stub, ctx)
 
 
 class ReferencedContent(BaseBodyElement):
-    def __init__(self, stub=None):
+    __slots__ = ('obj_id', 'href', 'text')
+
+    def __init__(self, stub=None, ctx=None):
         super(ReferencedContent, self).__init__(stub)
         self.obj_id = None
         self.href = None
@@ -230,7 +491,9 @@ class Figure(BaseBodyElement):
     structured element (e.g. <table>) inside <fig> would not be parsed correctly and its content
     would be reported de-structured.
     """
-    def __init__(self, stub=None):
+    __slots__ = ('content', 'namespace', 'text')
+
+    def __init__(self, stub=None, ctx=None):
         super(Figure, self).__init__(stub)
         self.content = None
         self.namespace = None
@@ -256,9 +519,11 @@ class Figure(BaseBodyElement):
 
 
 class TableGroup(NestedContainer):
-    def __init__(self, stub=None):
+    __slots__ = ()
+
+    def __init__(self, stub=None, ctx=None):
         # self.content = None
-        super(TableGroup, self).__init__(stub)
+        super(TableGroup, self).__init__(stub, ctx)
         # self.content = None
         #
         # if stub is not None:
@@ -269,8 +534,10 @@ class TableGroup(NestedContainer):
 
 
 class TableWrap(NestedContainer):
-    def __init__(self, stub=None):
-        super(TableWrap, self).__init__(stub)
+    __slots__ = ('footer',)
+
+    def __init__(self, stub=None, ctx=None):
+        super(TableWrap, self).__init__(stub, ctx)
 
         self.footer = None
 
@@ -280,87 +547,220 @@ class TableWrap(NestedContainer):
     def __repr__(self):
         return "TableWrap(title={}, caption={} content={})".format(self.title, self.caption, self.content)
 
-    def parse(self, stub):
+    def parse(self, stub, ctx=None):
+        ctx = ctx if ctx is not None else ParseContext()
         self.set_descriptive_attributes(stub)
 
         footer = stub.find("table-wrap-foot")
-        self.footer = footer.text if footer else None
+        self.footer = footer.text if footer is not None and len(footer) else None
 
         self.content = []
         for table in stub.findall("table"):
-            self.content.append(Table(table))
+            self.content.append(Table(table, ctx))
 
 
 class Table(BaseElement):
-    i = 1
+    """
+    A `<table>` resolved into a dense grid of cell texts
 
-    def __init__(self, stub=None):
+    `rows` is rectangular: a cell spanning several rows or columns is repeated in
+    every position it covers, and positions no cell covers are empty strings. The
+    first `header_rows` rows are the header of the table, taken from `<thead>` or,
+    without one, from the leading rows made only of `<th>` cells.
+    """
+    __slots__ = ('title', 'rows', 'header_rows', '_values')
+
+    def __init__(self, stub=None, ctx=None):
         super(Table, self).__init__(stub)
-        self.title = "Table{}".format(self.i)
+        self.title = "Table{}".format(ctx.next_table() if ctx is not None else 1)
         self.rows = None
-        Table.i += 1
+        self.header_rows = 0
+        self._values = None
 
         if stub is not None:
-            self.parse(stub)
+            if ctx is None or ctx.stats is None:
+                self.parse(stub, ctx)
+            else:
+                ctx.timed("table", self.parse, stub, ctx)
 
     def __repr__(self):
-        return "Table(shape=({}, {}))".format(len(self.rows), len(self.rows[0]))
+        return "Table(shape=({}, {}))".format(*self.shape)
+
+    @property
+    def shape(self):
+        return len(self.rows), len(self.rows[0]) if self.rows else 0
+
+    @property
+    def header(self):
+        """
+        :return: name of every column, the texts of its distinct header cells joined with spaces
+        """
+        header = []
+        for column in zip(*self.rows[:self.header_rows]):
+            header.append(' '.join(t for i, t in enumerate(column) if t and t not in column[:i]))
+        return header if self.header_rows else [str(i) for i in range(self.shape[1])]
+
+    @property
+    def data(self):
+        return self.rows[self.header_rows:]
 
     def name(self):
         return self.__class__.__name__
 
     def tabulate(self):
-        rpr = []
-
-        for row in self.rows:
-            col_widths = map(lambda t: len(max(t, key=len)), zip(*self.rows))
-            rpr.append("  ".join("{:<{r}}".format(cell, r=align) for cell, align in zip(row, col_widths)))
-        return '\n'.join(rpr)
+        if not self.rows:
+            return ''
+        col_widths = [max(map(len, column)) for column in zip(*self.rows)]
+        return '\n'.join("  ".join("{:<{r}}".format(cell, r=width) for cell, width in zip(row, col_widths))
+                         for row in self.rows)
 
-    def parse(self, stub):
+    def parse(self, stub, ctx=None):
         # parse caption
         # self.title = stub.get("id")
 
         # parse table
+        # rows themselves rather than their ids: lxml elements are proxies, whose ids are reused once freed
+        head = {tr for thead in stub.iter(tag="thead") for tr in thead.iter(tag="tr")}
+        self.set_rows([(tr in head, [(cell.tag, ''.join(cell.itertext()).strip(), cell.get("rowspan"),
+                                          cell.get("colspan")) for cell in tr])
+                       for tr in stub.iter(tag="tr")], ctx)
+
+    def set_rows(self, rows, ctx=None):
+        """
+        Resolve raw rows into the grid
+
+        :param rows: `(in_thead, cells)` of every `<tr>` in document order, with `(tag, text, rowspan, colspan)`
+            for every cell, spans being the raw attribute values
+        """
         self.rows = []
-        rowspans = {}
-        contents = {}
+        self._values = None
+        has_head = any(in_head for in_head, _ in rows)
+        header_rows = None
+        # column -> [rows left, text] of the cells spanning down from earlier rows
+        spans = {}
 
-        for elem in stub.iter(tag="tr"):
+        for in_head, cells in rows:
             row = []
-            cell_index = 0
-
-            for cell in list(elem):
-                cell_text = ''.join(cell.itertext()).strip()
-
-                rowspan = cell.get("rowspan")
-                rowspans[cell_index] = int(rowspan) if rowspan else (rowspans.get(cell_index, 0))
-                if rowspan is not None:
-                    contents[cell_index] = cell_text
-
-                if rowspan is None and rowspans[cell_index] > 0:
-                    row.append(contents[cell_index])
-                    rowspans[cell_index] -= 1
-
-                colspan = cell.get("colspan")
-                try:
-                    colspan = int(colspan) if colspan else 1
-                except ValueError:
-                    warnings.warn("html contained an error. Table {} will not be "
-                                  "faithful to the original".format(self.title))
-                    colspan = 1
-                row.extend([''.join(cell_text)]*colspan)
-
-                cell_index += colspan
+            for _, text, rowspan, colspan in cells:
+                while len(row) in spans:
+                    row.append(self._spanned(spans, len(row)))
+
+                rowspan = self._span(rowspan, ctx)
+                colspan = self._span(colspan, ctx)
+                for column in range(len(row), len(row) + colspan):
+                    # a cell overlapping a span from above takes its place
+                    if column in spans:
+                        self._spanned(spans, column)
+                    if rowspan > 1:
+                        spans[column] = [rowspan - 1, text]
+                row.extend([text] * colspan)
+
+            for column in sorted(c for c in spans if c >= len(row)):
+                row.extend([''] * (column - len(row)))
+                row.append(self._spanned(spans, column))
             self.rows.append(row)
 
+            if header_rows is None and not (in_head if has_head else
+                                            cells and all(cell[0] == "th" for cell in cells)):
+                header_rows = len(self.rows) - 1
+
+        width = max(map(len, self.rows)) if self.rows else 0
+        for row in self.rows:
+            row.extend([''] * (width - len(row)))
+        self.header_rows = header_rows if header_rows is not None else len(self.rows)
+
+    @staticmethod
+    def _spanned(spans, column):
+        span = spans[column]
+        span[0] -= 1
+        if span[0] == 0:
+            del spans[column]
+        return span[1]
+
+    def _span(self, value, ctx):
+        try:
+            return max(int(value), 1) if value else 1
+        except ValueError:
+            message = "html contained an error. Table {} will not be faithful to the original".format(self.title)
+            if ctx is not None:
+                ctx.warn("table", message)
+            else:
+                warnings.warn(message)
+            return 1
+
+    def values(self):
+        """
+        Cells of the data rows parsed as numbers, once per table
+
+        :return: list of rows of `float`, `None` for empty or non-numeric cells
+        """
+        if self._values is None:
+            self._values = [[_parse_number(cell) for cell in row] for row in self.data]
+        return self._values
+
+    def to_numpy(self, numeric=True):
+        """
+        :param numeric: return the cells parsed as numbers, as a `float64` array with `nan` for empty or
+            non-numeric cells (`True`) or the cell texts, as an `object` array (`False`)
+        :return: 2-D `numpy.ndarray` of the data rows, without the header
+        """
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("Exporting tables to arrays requires numpy (pip install numpy)")
+        if not numeric:
+            return np.array(self.data, dtype=object).reshape(len(self.data), self.shape[1])
+        return np.array(self.values(), dtype=np.float64).reshape(len(self.data), self.shape[1])
+
+    def to_dataframe(self):
+        """
+        Data rows as a `pandas.DataFrame` named after `header`
+
+        Columns whose non-empty cells are all numbers are `float64`, with `nan` for
+        empty cells; other columns keep the cell texts.
+
+        :return: `pandas.DataFrame`
+        """
+        try:
+            import pandas as pd
+        except ImportError:
+            raise ImportError("Exporting tables to data frames requires pandas (pip install pandas)")
+        if not self.data:
+            return pd.DataFrame(columns=self.header)
+        columns = []
+        for texts, numbers in zip(zip(*self.data), zip(*self.values())):
+            numeric = all(n is not None or not t for t, n in zip(texts, numbers)) and any(texts)
+            columns.append(pd.Series([float('nan') if n is None else n for n in numbers] if numeric else texts,
+                                     dtype='float64' if numeric else object))
+        frame = pd.concat(columns, axis=1, ignore_index=True) if columns else pd.DataFrame(index=range(len(self.data)))
+        frame.columns = self.header
+        return frame
+
     def get_content(self, **kwargs):
         text = kwargs.get("text")
         return [self.tabulate()] if text is True else [self]
 
 
+_number = re.compile(r'[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?%?$')
+
+
+def _parse_number(text):
+    """
+    :return: `text` as a `float`, `None` if it is not a number. Thousands separators, a unicode minus sign,
+        spaces after the sign and a trailing `%` are accepted, as often found in tables
+    """
+    text = text.replace('\u2212', '-').replace(' ', '').replace('\u2009', '').replace('\xa0', '')
+    if ',' in text and re.match(r'[-+]?\d{1,3}(,\d{3})+(\.\d*)?%?$', text):
+        text = text.replace(',', '')
+    if not _number.match(text):
+        return None
+    return float(text.rstrip('%'))
+
+
 class Name(BaseElement):
-    def __init__(self, stub=None):
+    __slots__ = ('surname', 'given_names', 'prefix', 'suffix')
+
+    def __init__(self, stub=None, ctx=None):
         super(Name, self).__init__(stub)
         self.surname = None
         self.given_names = None
@@ -381,7 +781,7 @@ class Name(BaseElement):
         return ' '.join(n for n in self if n is not None)
 
     def parse(self, stub):
-        if stub:
+        if stub is not None and len(stub):
             surname = stub.find("surname")
             gname = stub.find("given-names")
             prefix = stub.find("prefix")
@@ -394,6 +794,8 @@ class Name(BaseElement):
 
 
 class Author(BaseElement):
+    __slots__ = ('name', 'affiliations', 'email')
+
     def __init__(self, stub=None, affs=None):
         super(Author, self).__init__(stub)
         self.name = None
@@ -415,6 +817,9 @@ class Author(BaseElement):
 
         return author_repr
 
+    def _children(self):
+        return [self.name] + (self.affiliations or [])
+
     def parse(self, stub, affs):
         # name
         self.name = Name(stub.find("name"))
@@ -428,22 +833,39 @@ class Author(BaseElement):
 
 
 class Metadata(BaseElement):
-    def __init__(self, stub=None):
+    __slots__ = ('pmid', 'pmcid', 'title', 'doi', 'lazy', '_authors', '_ctx')
+
+    def __init__(self, stub=None, lazy=False, ctx=None):
         super(Metadata, self).__init__(stub)
         self.pmid = None
         self.pmcid = None
         self.title = None
         self.doi = None
-        self.authors = None
+        self.lazy = lazy
+        self._authors = None
+        self._ctx = ctx if lazy is True else None
 
         if stub is not None:
-            self.parse(stub)
+            self.parse(stub, ctx)
+
+    @property
+    def authors(self):
+        if self._authors is None and self.lazy is True and self.xml is not None:
+            self._authors = self._parse_contribs(self.xml, self._ctx)
+        return self._authors
+
+    @authors.setter
+    def authors(self, authors):
+        self._authors = authors
 
     def __repr__(self):
         return "Metadata(pmid='{}', title='{}', doi='{}', authors={})".format(
             self.pmid, self.title, self.doi, self.authors)
 
-    def parse(self, stub):
+    def _children(self):
+        return self.authors or []
+
+    def parse(self, stub, ctx=None):
         pmid = stub.find("article-id[@pub-id-type='pmid']")
         pmcid = stub.find("article-id[@pub-id-type='pmcid']")
         doi = stub.find("article-id[@pub-id-type='doi']")
@@ -453,6 +875,10 @@ class Metadata(BaseElement):
 
         self.title = stub.find("title-group/article-title").text
 
+        if self.lazy is not True:
+            self.authors = self._parse_contribs(stub, ctx)
+
+    def _parse_contribs(self, stub, ctx=None):
         author_tags = stub.findall("contrib-group/contrib[@contrib-type='author']")
         affils_tags = stub.findall("contrib-group/aff")
 
@@ -461,15 +887,15 @@ class Metadata(BaseElement):
             # if affils_tags:
             # # affils_tags = [affils_tags for _ in author_tags]
 
-        self.authors = self._parse_authors(author_tags, affils_tags)
+        return self._parse_authors(author_tags, affils_tags, ctx)
 
     @staticmethod
-    def _parse_authors(contrib_group, aff):
+    def _parse_authors(contrib_group, aff, ctx=None):
         authors = []
         affiliations = {}
 
         for i, affil in enumerate(aff):
-            aff = Affiliation(affil)
+            aff = Affiliation(affil, ctx)
             if aff.aid is not None:
                 affiliations[aff.aid] = aff
             else:
@@ -483,13 +909,18 @@ class Metadata(BaseElement):
 
 
 class Affiliation(BaseElement):
-    def __init__(self, stub=None):
+    __slots__ = ('institution', 'aid')
+
+    def __init__(self, stub=None, ctx=None):
         super(Affiliation, self).__init__(stub)
         self.institution = None
         self.aid = None
 
         if stub is not None:
-            self.parse(stub)
+            if ctx is None or ctx.stats is None:
+                self.parse(stub)
+            else:
+                ctx.timed("affiliation", self.parse, stub)
 
     def __repr__(self):
         return "Affiliation(id='{}' institution='{}')".format(self.aid, ' '.join(self.institution))
@@ -510,6 +941,8 @@ class Affiliation(BaseElement):
 
 
 class Journal(BaseElement):
+    __slots__ = ('jid', 'title')
+
     def __init__(self, stub=None):
         super(Journal, self).__init__(stub)
         self.jid = None
@@ -523,18 +956,42 @@ class Journal(BaseElement):
 
     def parse(self, stub):
         title = stub.find("journal-title-group/journal-title")
-        self.title = title.text if title else None
+        self.title = "".join(title.itertext()).strip() if title is not None else None
         self.jid = stub.find("journal-id").text
 
 
 class Front(BaseElement):
-    def __init__(self, stub=None):
-        super(Front, self).__init__(stub)
-        self.journal_meta = None
-        self.article_meta = None
+    __slots__ = ('lazy', '_journal_meta', '_article_meta', '_ctx')
 
-        if stub is not None:
-            self.parse(stub)
+    def __init__(self, stub=None, lazy=False, ctx=None):
+        super(Front, self).__init__(stub)
+        self.lazy = lazy
+        self._journal_meta = None
+        self._article_meta = None
+        self._ctx = ctx if lazy is True else None
+
+        if stub is not None and lazy is not True:
+            self.parse(stub, ctx)
+
+    @property
+    def journal_meta(self):
+        if self._journal_meta is None and self.lazy is True and self.xml is not None:
+            self._journal_meta = Journal(self.xml.find("journal-meta"))
+        return self._journal_meta
+
+    @journal_meta.setter
+    def journal_meta(self, journal_meta):
+        self._journal_meta = journal_meta
+
+    @property
+    def article_meta(self):
+        if self._article_meta is None and self.lazy is True and self.xml is not None:
+            self._article_meta = Metadata(self.xml.find("article-meta"), lazy=True, ctx=self._ctx)
+        return self._article_meta
+
+    @article_meta.setter
+    def article_meta(self, article_meta):
+        self._article_meta = article_meta
 
     def __iter__(self):
         for ele in [self.journal_meta, self.article_meta]:
@@ -543,27 +1000,33 @@ class Front(BaseElement):
     def __repr__(self):
         return "Front({})".format(', '.join(map(repr, self)))
 
-    def parse(self, stub):
+    def _children(self):
+        return list(self)
+
+    def parse(self, stub, ctx=None):
         self.journal_meta = Journal(stub.find("journal-meta"))
-        self.article_meta = Metadata(stub.find("article-meta"))
+        self.article_meta = Metadata(stub.find("article-meta"), ctx=ctx)
 
 
 class Paragraph(NestedContainer):
-    i = 1
+    __slots__ = ('n',)
 
-    def __init__(self, stub=None):
-        super(Paragraph, self).__init__(stub)
-        self.n = Paragraph.i
+    def __init__(self, stub=None, ctx=None):
+        ctx = ctx if ctx is not None else ParseContext()
+        super(Paragraph, self).__init__(stub, ctx)
+        # numbered once parsed, after the paragraphs it contains
+        self.n = ctx.next_paragraph()
         self.title = "Paragraph{}".format(self.n)
-        Paragraph.i += 1
 
     def __repr__(self):
         return "Paragraph(i={}, {})".format(self.n, ', '.join(map(repr, self)))
 
 
 class Section(NestedContainer):
-    def __init__(self, stub=None):
-        super(Section, self).__init__(stub)
+    __slots__ = ()
+
+    def __init__(self, stub=None, ctx=None):
+        super(Section, self).__init__(stub, ctx)
         #
         # # if stub is not None:
         # #     self.parse(stub)
@@ -579,12 +1042,14 @@ class Section(NestedContainer):
 
 
 class Body(BaseBodyElement):
-    def __init__(self, stub=None):
+    __slots__ = ('content',)
+
+    def __init__(self, stub=None, ctx=None):
         super(Body, self).__init__(stub)
         self.content = []
 
         if stub is not None:
-            self.parse(stub)
+            self.parse(stub, ctx)
 
     def __len__(self):
         return len(self.content)
@@ -597,10 +1062,25 @@ class Body(BaseBodyElement):
             for ele in self.content:
                 yield ele
 
-    def parse(self, stub):
+    def _children(self):
+        return self.content
+
+    def parse(self, stub, ctx=None):
+        ctx = ctx if ctx is not None else ParseContext()
         for elem in list(stub):
             if elem.tag not in self.unspported_tags:
-                self.content.append(self.html_classes[elem.tag](elem))
+                cls = self.html_classes[elem.tag]
+                if ctx.sections is None or (cls is Section and ctx.selects(self._section_title(elem))):
+                    self.content.append(cls(elem, ctx=ctx))
+
+    @staticmethod
+    def _section_title(stub):
+        """
+        Title of the `Section` of `stub`, without building it
+        """
+        section = Section()
+        section.describe(*_descriptive_texts(*(stub.find(tag) for tag in ("label", "caption", "title"))))
+        return section.title
 
     def get_structure(self, main_sections=False):
         if main_sections is True:
@@ -611,9 +1091,10 @@ class Body(BaseBodyElement):
         return sections
 
     def get_flat(self, sections=None, text=False):
+        sections = _as_sections(sections)
         bd = []
         for ele in self:
-            if sections is None or (isinstance(sections, list) and ele.title in sections):
+            if _selects(sections, ele.title):
                 bd.extend(ele.get_content(flatten=True, text=text))
         return bd
 
@@ -628,24 +1109,90 @@ class Body(BaseBodyElement):
             secs = [(ele.title, ele.get_content(text=text)) for ele in self]
 
         if sections is not None:
-            secs = [e for e in secs if e[0] in sections]
+            sections = _as_sections(sections)
+            secs = [e for e in secs if _selects(sections, e[0])]
 
         return secs
 
 
 class Article(BaseElement):
-    def __init__(self, xml=None):
+    """
+    Parsed `<article>`
+
+    With `lazy=True` only the article type is read when the object is created:
+    `front`, `body` and the metadata objects under `front` are built the first
+    time they are accessed, and subtrees that are never accessed are never
+    walked. A job that only calls `get_title()` pays for `<article-meta>` alone.
+
+    With `keep_xml=False` the article is fully built and every node drops its
+    reference to the source xml (see `release`), so the parsed tree no longer
+    keeps the `ElementTree` alive. `lazy` has no effect in that case.
+
+    With a `ParseStats` as `stats`, the time spent building each part of the
+    article and the elements it contains are recorded in it.
+
+    `sections` selects the top-level sections of the body to build, as a title
+    or compiled regular expression (matched with `search`), or a list of them,
+    e.g. `["Methods", re.compile("^Results")]`. Other sections and any other
+    top-level content of the body are skipped without being built, and
+    paragraphs and tables are numbered among the built ones only.
+
+    The flat and nested views of the body (`get_flat_content`, `todict`, ...)
+    are computed once per set of arguments and the same lists are returned by
+    later calls, so they must not be modified. Their `sections` argument selects
+    top-level sections the same way as the `sections` given to parse.
+    """
+    __slots__ = ('type', 'lazy', '_front', '_body', '_front_xml', '_body_xml', 'back', '_dict', '_views', '_countries',
+                 '_ctx')
+
+    def __init__(self, xml=None, lazy=False, keep_xml=True, stats=None, sections=None):
         super(Article, self).__init__(xml)
         self.type = None
-        self.front = None
-        self.body = None
+        self.lazy = lazy
+        self._front = None
+        self._body = None
+        self._front_xml = None
+        self._body_xml = None
         self.back = None
         self._dict = None
-        self._list = None
-        Paragraph.i = 1
+        self._views = None
+        self._countries = None
+        self._ctx = ParseContext(stats, sections)
 
         if xml is not None:
             self.parse(xml)
+            if keep_xml is not True:
+                self.release()
+
+    @property
+    def front(self):
+        if self._front is None and self._front_xml is not None:
+            if self._ctx.stats is None:
+                self._front = Front(self._front_xml, lazy=self.lazy)
+            else:
+                self._front = self._ctx.timed("front", Front, self._front_xml, self.lazy, self._ctx)
+            self._front_xml = None
+        return self._front
+
+    @front.setter
+    def front(self, front):
+        self._front = front
+
+    @property
+    def body(self):
+        if self._body is None and self._body_xml is not None:
+            if self._ctx.stats is None:
+                self._body = Body(self._body_xml, self._ctx)
+            else:
+                self._body = self._ctx.timed("body", Body, self._body_xml, self._ctx)
+            self._body_xml = None
+        return self._body
+
+    @body.setter
+    def body(self, body):
+        self._body = body
+        self._dict = None
+        self._views = None
 
     def __repr__(self):
         return 'Article(journal={}, title={})'.format(
@@ -656,40 +1203,79 @@ class Article(BaseElement):
     def parse(self, xml):
         if isinstance(xml, str):
             xml_tree = ElementTree.parse(xml)
-        elif isinstance(xml, ElementTree.Element):
+        elif ElementTree.iselement(xml):
             xml_tree = xml
         else:
             raise ValueError("Expecting str or ET.Element, got (%s)", type(xml))
 
         self.xml = xml_tree
         self.type = xml_tree.attrib.get("article-type")
+        if self._ctx.stats is not None:
+            self._ctx.stats.articles += 1
+            self._ctx.stats.tags.update(elem.tag for elem in xml_tree.iter())
 
         for elem in list(xml_tree):
             if elem.tag == "front":
-                self.front = Front(elem)
+                self._front_xml = elem
             elif elem.tag == "body":
-                self.body = Body(elem)
+                self._body_xml = elem
             elif elem.tag == "back":
                 pass
             elif elem.tag == "floats-group":
                 pass
 
+        if self.lazy is not True:
+            self.materialize()
+
+    def materialize(self):
+        """
+        Build every part of the article that has not been accessed yet
+
+        :return: the article itself
+        """
+        if self.front is not None and self.front.article_meta is not None:
+            self.front.journal_meta, self.front.article_meta.authors
+        self.body
+        return self
+
+    def release(self):
+        """
+        Build the whole article, then drop every reference to the source xml
+        """
+        self.materialize()
+        self._ctx = None
+        super(Article, self).release()
+
+    def _children(self):
+        return [self.front, self.body]
+
+    def _view(self, name, sections=None, **kwargs):
+        """
+        Result of `Body.<name>(sections=sections, **kwargs)`, computed once per set of arguments
+        """
+        if self.body is None:
+            return None
+        if self._views is None:
+            self._views = {}
+        sections = _as_sections(sections)
+        key = (name, sections, tuple(sorted(kwargs.items())))
+        view = self._views.get(key)
+        if view is None:
+            view = self._views[key] = getattr(self.body, name)(sections=sections, **kwargs)
+        return view
+
     # TODO: implement clean option
     def get_flat_text(self, sections=None):
-        return self.body.get_flat(sections=sections, text=True) if self.body is not None else None
+        return self._view("get_flat", sections, text=True)
 
     def get_flat_content(self, sections=None):
-        if self._list is None:
-            self._list = self.body.get_flat(sections=sections) if self.body is not None else None
-        return self._list
+        return self._view("get_flat", sections, text=False)
 
     def get_nested_text(self, main_sections=False, sections=None):
-        return self.body.get_nested(main_sections=main_sections, sections=sections, text=True) \
-            if self.body is not None else None
+        return self._view("get_nested", sections, main_sections=main_sections, text=True)
 
     def get_nested_content(self, main_sections=False, sections=None):
-        return self.body.get_nested(main_sections=main_sections, sections=sections) \
-            if self.body is not None else None
+        return self._view("get_nested", sections, main_sections=main_sections, text=False)
 
     def get_body_structure(self, main_sections=False):
         return self.body.get_structure(main_sections=main_sections) if self.body is not None else None
@@ -732,11 +1318,167 @@ class Article(BaseElement):
         return [aff for auth_aff in (a.affiliations for a in self.get_authors()) for aff in auth_aff if aff]
 
     def get_countries(self):
-        c = []
-        affils = self.get_affiliations()
-
-        if affils:
-            p = re.compile('(' + ')|('.join(countries) + ')')
-            c = [p.search(' '.join(a.institution)) for a in self.get_affiliations()]
-            c = [m.group() for m in c if m]
-        return c
\ No newline at end of file
+        if self._countries is None:
+            self._countries = [c for c in map(find_country, self._affiliation_texts()) if c is not None]
+        return self._countries
+
+    def _affiliation_texts(self):
+        return [' '.join(filter(None, a.institution)) for a in self.get_affiliations() if a.institution]
+
+    def to_bytes(self):
+        """
+        Serialize the parsed article, without its source xml
+
+        The article is built first if it is lazy. The output is a versioned header
+        followed by the zlib compressed json array of the nodes of the article (see
+        `FORMAT_VERSION`). It does not depend on the Python version and is several
+        times smaller than a pickle of the article. Read it back with `from_bytes`.
+
+        :return: bytes
+        """
+        self.materialize()
+        data = json.dumps(_encode(self, {}), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return _MAGIC + bytes([FORMAT_VERSION]) + zlib.compress(data, 1)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Rebuild an article serialized with `to_bytes`
+
+        The article has the same front matter and body tree as the serialized one,
+        with affiliations shared between authors as they were, but no source xml.
+
+        :param data: bytes returned by `to_bytes`
+        :return: `Article` object
+        """
+        if data[:len(_MAGIC)] != _MAGIC:
+            raise ValueError("Not a serialized article")
+        version = data[len(_MAGIC)]
+        if version != FORMAT_VERSION:
+            raise ValueError("Unsupported serialization format version {}, expecting {}".format(
+                version, FORMAT_VERSION))
+        return _decode(json.loads(zlib.decompress(data[len(_MAGIC) + 1:]).decode('utf-8')), [])
+
+
+def geotag_articles(articles):
+    """
+    Tag the affiliations of many articles with countries in a single pass
+
+    Affiliations are collected across all articles and every distinct affiliation
+    is matched once, which pays off as affiliations repeat across authors and
+    across articles.
+
+    :param articles: iterable of `Article`
+    :return: list with the countries of each article, as returned by `Article.get_countries`
+    """
+    articles = list(articles)
+    texts = [article._affiliation_texts() for article in articles]
+    found = iter(geotag(text for article_texts in texts for text in article_texts))
+
+    tagged = []
+    for article, article_texts in zip(articles, texts):
+        article._countries = [c for c in itertools.islice(found, len(article_texts)) if c is not None]
+        tagged.append(article._countries)
+    return tagged
+
+
+BaseBodyElement.html_classes.update({
+    "sec": Section,
+    "p": Paragraph,
+    "fig": Figure,
+    "graphic": ReferencedContent,
+    "media": ReferencedContent,
+    "disp-formula": ReferencedContent,
+    "table": Table,
+    "table-wrap": TableWrap,
+    "table-wrap-group": TableGroup,
+    "supplementary-material": NestedContainer,
+    "boxed-text": SeparatedContent,
+    'named-content': SeparatedContent,
+    'speech': SeparatedContent,
+    'speaker': Name,
+    "list": List,
+    'xref': ReferencedContent,
+    'ext-link': ReferencedContent,
+    'inline-graphic': ReferencedContent,
+    'disp-quotsing alle': NestedContainer,
+    'statement': NestedContainer,
+    'related-article': Front
+})
+
+
+# Serialization format of `Article.to_bytes`: every node is a json array made of the
+# code of its class followed by its fields. Fields ending with `@` hold a node and
+# fields ending with `*` a list of nodes; other fields are plain values. Codes and
+# fields are part of the format: append to this table and bump `FORMAT_VERSION`.
+FORMAT_VERSION = 2
+_MAGIC = b'PMA'
+_schemas = [
+    (Text, ('text', 'title')),
+    (List, ('label', 'caption', 'title', 'elements')),
+    (NestedContainer, ('label', 'caption', 'title', 'content*')),
+    (SeparatedContent, ('label', 'caption', 'title', 'content*')),
+    (ReferencedContent, ('label', 'caption', 'title', 'obj_id', 'href', 'text')),
+    (Figure, ('label', 'caption', 'title', 'text')),
+    (TableGroup, ('label', 'caption', 'title', 'content*')),
+    (TableWrap, ('label', 'caption', 'title', 'footer', 'content*')),
+    (Table, ('title', 'rows', 'header_rows')),
+    (Name, ('prefix', 'given_names', 'surname', 'suffix')),
+    (Author, ('name@', 'email', 'affiliations*')),
+    (Metadata, ('pmid', 'pmcid', 'title', 'doi', '_authors*')),
+    (Affiliation, ('aid', 'institution')),
+    (Journal, ('jid', 'title')),
+    (Front, ('_journal_meta@', '_article_meta@')),
+    (Paragraph, ('label', 'caption', 'title', 'n', 'content*')),
+    (Section, ('label', 'caption', 'title', 'content*')),
+    (Body, ('content*',)),
+    (Article, ('type', '_front@', '_body@')),
+]
+# a node already serialized earlier in the same article: [_REF, index]
+_REF = -1
+_codes = {cls: code for code, (cls, _) in enumerate(_schemas)}
+_fields = [[(f.rstrip('@*'), f[-1] if f[-1] in '@*' else None) for f in fields] for _, fields in _schemas]
+_slots = [[slot for c in cls.__mro__ for slot in getattr(c, '__slots__', ())] for cls, _ in _schemas]
+
+
+def _encode(node, shared):
+    if node is None:
+        return None
+    if isinstance(node, Affiliation):
+        if id(node) in shared:
+            return [_REF, shared[id(node)]]
+        shared[id(node)] = len(shared)
+
+    code = _codes[type(node)]
+    data = [code]
+    for name, kind in _fields[code]:
+        value = getattr(node, name)
+        if kind == '@':
+            value = _encode(value, shared)
+        elif kind == '*' and value is not None:
+            value = [_encode(v, shared) for v in value]
+        data.append(value)
+    return data
+
+
+def _decode(data, shared):
+    if data is None:
+        return None
+    code = data[0]
+    if code == _REF:
+        return shared[data[1]]
+
+    cls = _schemas[code][0]
+    node = cls.__new__(cls)
+    for slot in _slots[code]:
+        setattr(node, slot, None)
+    if cls is Affiliation:
+        shared.append(node)
+
+    for (name, kind), value in zip(_fields[code], data[1:]):
+        if kind == '@':
+            value = _decode(value, shared)
+        elif kind == '*' and value is not None:
+            value = [_decode(v, shared) for v in value]
+        setattr(node, name, value)
+    return node
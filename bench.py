@@ -0,0 +1,273 @@
+"""
+Throughput benchmarks of parsing and extraction
+
+Every benchmark runs over every corpus: the bundled `examples/` files and a
+synthetic multi-article bundle (see `synthetic`). Each (benchmark, corpus) pair
+is measured in a fresh process so that its peak RSS is its own, and reports:
+
+- `seconds`: best wall time over `repeat` runs (`mean` is the average)
+- `articles_per_s` and `mb_per_s`: throughput of the best run, over the
+  articles and the decompressed xml bytes of the corpus
+- `peak_rss`: peak resident set size of the process, in bytes
+- `alloc_peak` and `alloc_blocks`: peak memory traced by `tracemalloc` and net
+  number of blocks still allocated, measured over one extra run
+
+Run it as a script; `--json` writes the results for trend tracking::
+
+    python bench.py --articles 2000 --repeat 3 --json bench.json
+
+`retained` measures instead the memory that parsed articles keep alive::
+
+    python -c "import bench; print(bench.retained('examples/example0.xml', keep_xml=False))"
+"""
+from concurrent.futures import ProcessPoolExecutor
+from pubmedpy import iter_articles, _iter_xml_sources, _iter_article_chunks
+from article import Article, Table
+from countries import find_country
+import synthetic
+import xml.etree.ElementTree as et
+import argparse
+import datetime
+import gc
+import glob
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def _tokenize(corpus):
+    return [et.fromstring(chunk) for chunk in corpus.chunks]
+
+
+def _parse(corpus):
+    return [Article(elem) for elem in _tokenize(corpus)]
+
+
+def _tables(corpus):
+    return [table for elem in _tokenize(corpus) for table in elem.iter("table")]
+
+
+def _run_iter_articles(corpus):
+    for _ in iter_articles(corpus.path):
+        pass
+
+
+def _run_article_parse(elems):
+    for elem in elems:
+        Article(elem)
+
+
+def _run_flat_text(articles):
+    for article in articles:
+        article.get_flat_text()
+
+
+def _run_nested_content(articles):
+    for article in articles:
+        article.get_nested_content()
+
+
+def _run_tables(tables):
+    for table in tables:
+        Table(table).tabulate()
+
+
+def _setup_countries(corpus):
+    articles = _parse(corpus)
+    for article in articles:
+        article._countries = None
+    find_country.cache_clear()
+    return articles
+
+
+def _run_countries(articles):
+    for article in articles:
+        article.get_countries()
+
+
+# name -> (setup, run). `setup(corpus)` is not timed, `run(setup(corpus))` is
+BENCHMARKS = {
+    "iter_articles": (lambda corpus: corpus, _run_iter_articles),
+    "Article.parse": (_tokenize, _run_article_parse),
+    "get_flat_text": (_parse, _run_flat_text),
+    "get_nested_content": (_parse, _run_nested_content),
+    "Table.parse+tabulate": (_tables, _run_tables),
+    "get_countries": (_setup_countries, _run_countries),
+}
+
+
+class Corpus(object):
+    """
+    Articles of one xml file, kept as raw `<article>` byte chunks
+    """
+    def __init__(self, path):
+        self.path = path
+        self.chunks = [chunk for _, f in _iter_xml_sources(path) for _, chunk in _iter_article_chunks(f)]
+        self.nbytes = sum(map(len, self.chunks))
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def __repr__(self):
+        return "Corpus(path='{}', articles={}, nbytes={})".format(self.path, len(self), self.nbytes)
+
+
+def measure(name, path, repeat=3):
+    """
+    Run one benchmark over one corpus in the current process
+
+    :return: dict of results, see the module docstring
+    """
+    setup, run = BENCHMARKS[name]
+    corpus = Corpus(path)
+
+    times = []
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for _ in range(repeat):
+            state = setup(corpus)
+            gc.collect()
+            start = time.perf_counter()
+            run(state)
+            times.append(time.perf_counter() - start)
+        peak_rss = _peak_rss()
+
+        state = setup(corpus)
+        gc.collect()
+        blocks = sys.getallocatedblocks()
+        tracemalloc.start()
+        run(state)
+        _, alloc_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        alloc_blocks = sys.getallocatedblocks() - blocks
+
+    best = min(times)
+    return {
+        "benchmark": name,
+        "corpus": os.path.basename(path),
+        "articles": len(corpus),
+        "bytes": corpus.nbytes,
+        "seconds": best,
+        "mean": sum(times) / len(times),
+        "articles_per_s": len(corpus) / best if best else None,
+        "mb_per_s": corpus.nbytes / best / 1e6 if best else None,
+        "peak_rss": peak_rss,
+        "alloc_peak": alloc_peak,
+        "alloc_blocks": alloc_blocks,
+    }
+
+
+def retained(path, copies=10, **kwargs):
+    """
+    Memory allocated by `Article(elem, **kwargs)` and still held by the parsed articles
+
+    The `<article>` elements of `path` are tokenized `copies` times beforehand,
+    so the xml tree itself is not counted, only what parsing adds to it.
+
+    :param path: xml file accepted by `iter_articles`
+    :param copies: parses of every article, averaged over
+    :param kwargs: arguments of `Article`, e.g. `keep_xml=False`
+    :return: `(bytes, blocks)` per parsed article
+    """
+    elems = [elem for _ in range(copies) for elem in _tokenize(Corpus(path))]
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    articles = [Article(elem, **kwargs) for elem in elems]
+    gc.collect()
+    diff = tracemalloc.take_snapshot().compare_to(before, "filename")
+    tracemalloc.stop()
+    return (sum(d.size_diff for d in diff) // len(articles), sum(d.count_diff for d in diff) // len(articles))
+
+
+def run_benchmarks(paths, names=None, repeat=3):
+    """
+    Run benchmarks over corpora, each pair in a fresh process
+
+    :param paths: xml files accepted by `iter_articles`
+    :param names: benchmarks to run. Defaults to every benchmark in `BENCHMARKS`
+    :param repeat: timed runs per pair
+    :return: list of result dicts, see `measure`
+    """
+    results = []
+    for path in paths:
+        for name in names or BENCHMARKS:
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                results.append(executor.submit(measure, name, path, repeat).result())
+    return results
+
+
+def _peak_rss():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def _default_corpora():
+    here = os.path.dirname(os.path.abspath(__file__))
+    corpora = []
+    for path in sorted(glob.glob(os.path.join(here, "examples", "*.xml*"))):
+        if len(Corpus(path)) > 0:
+            corpora.append(path)
+        else:
+            warnings.warn("No <article> found in {}, skipping it".format(path))
+    return corpora
+
+
+def _report(results):
+    row = "{:<22}{:<24}{:>9}{:>11}{:>10}{:>10}{:>12}{:>12}"
+    print(row.format("benchmark", "corpus", "articles", "seconds", "art/s", "MB/s", "rss MB", "alloc MB"))
+    for r in results:
+        print(row.format(r["benchmark"], r["corpus"], r["articles"], "{:.4f}".format(r["seconds"]),
+                         "{:.1f}".format(r["articles_per_s"] or 0), "{:.2f}".format(r["mb_per_s"] or 0),
+                         "{:.1f}".format((r["peak_rss"] or 0) / 1e6), "{:.1f}".format(r["alloc_peak"] / 1e6)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark parsing and extraction throughput.')
+    parser.add_argument('corpora', nargs='*', help='xml files to benchmark. Defaults to examples/ and a synthetic bundle')
+    parser.add_argument('-n', '--articles', type=int, default=1000, help='number of articles of the synthetic bundle')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='seed of the synthetic bundle')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='timed runs per benchmark')
+    parser.add_argument('-b', '--benchmark', action='append', choices=list(BENCHMARKS), help='benchmark to run (repeatable)')
+    parser.add_argument('-j', '--json', help='write results as json to this path (- for stdout)')
+
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpora = args.corpora
+        if not corpora:
+            corpora = _default_corpora()
+            if args.articles > 0:
+                corpora.append(synthetic.write_corpus(os.path.join(tmp, "synthetic.xml.gz"), args.articles, args.seed))
+
+        results = run_benchmarks(corpora, names=args.benchmark, repeat=args.repeat)
+
+    payload = {
+        "date": datetime.datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if args.json == "-":
+        json.dump(payload, sys.stdout, indent=2)
+    else:
+        _report(results)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(payload, f, indent=2)
@@ -0,0 +1,71 @@
+"""
+Blocked gzip: gzip files made of independent members whose size is known upfront
+
+Every member carries a gzip extra subfield `PM` holding the total length of the
+member in bytes (little-endian uint32). The file is still a regular multi-member
+gzip file that any gzip reader decompresses as a whole, but a reader aware of
+the `PM` subfield can also locate members without decompressing them, seek to
+a single member, or decompress members independently of each other.
+"""
+import struct
+import zlib
+
+MAGIC = b'\x1f\x8b\x08\x04'
+HEADER_SIZE = 20
+_header = struct.Struct('<4sIBBH2sHI')
+_trailer = struct.Struct('<II')
+
+
+def compress_member(data, level=6):
+    """
+    :return: `data` compressed as a single blocked gzip member
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    deflated = compressor.compress(data) + compressor.flush()
+    size = HEADER_SIZE + len(deflated) + _trailer.size
+    header = _header.pack(MAGIC, 0, 0, 255, 8, b'PM', 4, size)
+    return header + deflated + _trailer.pack(zlib.crc32(data) & 0xffffffff, len(data) & 0xffffffff)
+
+
+def decompress_member(member):
+    """
+    :return: decompressed content of a single blocked gzip member
+    """
+    return zlib.decompress(member[HEADER_SIZE:], -zlib.MAX_WBITS)
+
+
+def member_size(header):
+    """
+    :param header: at least the first `HEADER_SIZE` bytes of a member
+    :return: total length of the member, or `None` if it is not a blocked gzip member
+    """
+    if len(header) < HEADER_SIZE:
+        return None
+    magic, _, _, _, xlen, subfield, slen, size = _header.unpack(header[:HEADER_SIZE])
+    if magic != MAGIC or xlen != 8 or subfield != b'PM' or slen != 4:
+        return None
+    return size
+
+
+def is_blocked(path):
+    """
+    :return: whether the file at `path` starts with a blocked gzip member
+    """
+    with open(path, 'rb') as f:
+        return member_size(f.read(HEADER_SIZE)) is not None
+
+
+def iter_members(f):
+    """
+    Yield `(offset, member)` for every member of a blocked gzip stream, without decompressing them
+    """
+    offset = 0
+    while True:
+        header = f.read(HEADER_SIZE)
+        if not header:
+            break
+        size = member_size(header)
+        if size is None:
+            raise ValueError("Not a blocked gzip member at offset {}".format(offset))
+        yield offset, header + f.read(size - HEADER_SIZE)
+        offset += size
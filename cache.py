@@ -0,0 +1,163 @@
+from pubmedpy import iter_articles
+from article import Article, _pmcid
+import os
+import sqlite3
+import time
+
+# bumped whenever the layout of the database or of the stored articles changes
+SCHEMA_VERSION = 5
+
+
+class ArticleCache(object):
+    """
+    Persistent cache of parsed articles, stored in a SQLite database
+
+    Articles are cached per source file, keyed by the absolute path and
+    modification time of the file and by the PMCID of each article. A file is
+    served from the cache only once all of its articles have been stored; if
+    the file is modified its entries are dropped and it is parsed again.
+
+    The cache holds at most `max_size` bytes of serialized articles. When it
+    grows beyond that, whole files are evicted, least recently used first.
+
+    Articles are stored serialized with `Article.to_bytes`, so cached articles
+    hold their parsed content but no source xml. A cache written by an older
+    version of this module is emptied when opened::
+
+        cache = ArticleCache("articles.sqlite")
+        for article in cache.iter_articles("bundle.xml.gz"):
+            article.get_title()
+    """
+    def __init__(self, path, max_size=1 << 32):
+        self.path = path
+        self.max_size = max_size
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self.db.executescript("""
+                DROP TABLE IF EXISTS articles;
+                DROP TABLE IF EXISTS files;
+                PRAGMA user_version = {};
+            """.format(SCHEMA_VERSION))
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                source TEXT PRIMARY KEY,
+                mtime REAL NOT NULL,
+                size INTEGER NOT NULL DEFAULT 0,
+                complete INTEGER NOT NULL DEFAULT 0,
+                last_access REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS articles (
+                source TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                member TEXT NOT NULL,
+                pmcid TEXT,
+                data BLOB NOT NULL,
+                PRIMARY KEY (source, position)
+            );
+            CREATE INDEX IF NOT EXISTS articles_pmcid ON articles (source, pmcid);
+        """)
+
+    def __repr__(self):
+        return "ArticleCache(path='{}', size={}, max_size={})".format(self.path, self.size(), self.max_size)
+
+    def close(self):
+        self.db.close()
+
+    def size(self):
+        """
+        :return: bytes of serialized articles currently cached
+        """
+        return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM files").fetchone()[0]
+
+    def iter_articles(self, xml_file, with_path=False):
+        """
+        Yield the articles of `xml_file`, from the cache when it holds the current version of the file
+
+        :param xml_file: path accepted by `pubmedpy.iter_articles`
+        :param with_path: yield `(path, article)` tuples, as in `pubmedpy.iter_articles`
+        :return: parsed `Article` objects
+        """
+        source, mtime = self._key(xml_file)
+        if self._is_cached(source, mtime):
+            rows = self.db.execute("SELECT member, data FROM articles WHERE source = ? ORDER BY position", (source,))
+            for path, data in rows:
+                article = Article.from_bytes(data)
+                yield (path, article) if with_path is True else article
+            return
+
+        self._reset(source, mtime)
+        for position, (path, article) in enumerate(iter_articles(xml_file, with_path=True, keep_xml=False)):
+            data = article.to_bytes()
+            meta = article.front.article_meta if article.front is not None else None
+            # stored without the "PMC" prefix, as `parse_article` looks them up
+            pmcid = _pmcid(meta.pmcid) if meta is not None and meta.pmcid is not None else None
+            with self.db:
+                self.db.execute("INSERT INTO articles VALUES (?, ?, ?, ?, ?)", (source, position, path, pmcid, data))
+                self.db.execute("UPDATE files SET size = size + ? WHERE source = ?", (len(data), source))
+            yield (path, article) if with_path is True else article
+
+        with self.db:
+            self.db.execute("UPDATE files SET complete = 1 WHERE source = ?", (source,))
+        self._evict(keep=source)
+
+    def parse_article(self, xml_file, pmcid=None):
+        """
+        Return one article of `xml_file`, parsing and caching the whole file if needed
+
+        :param xml_file: path accepted by `pubmedpy.iter_articles`
+        :param pmcid: PMCID of the article, with or without the "PMC" prefix. Defaults to the first article of the file
+        :return: `Article` object or `None` if there is no such article
+        """
+        source, mtime = self._key(xml_file)
+        if not self._is_cached(source, mtime):
+            for _ in self.iter_articles(xml_file):
+                pass
+
+        if pmcid is None:
+            row = self.db.execute("SELECT data FROM articles WHERE source = ? ORDER BY position LIMIT 1",
+                                  (source,)).fetchone()
+        else:
+            row = self.db.execute("SELECT data FROM articles WHERE source = ? AND pmcid = ?",
+                                  (source, _pmcid(pmcid))).fetchone()
+        return Article.from_bytes(row[0]) if row is not None else None
+
+    def invalidate(self, xml_file=None):
+        """
+        Drop the cached articles of `xml_file`, or of every file if `None`
+        """
+        with self.db:
+            if xml_file is None:
+                self.db.execute("DELETE FROM articles")
+                self.db.execute("DELETE FROM files")
+            else:
+                source = os.path.abspath(xml_file)
+                self.db.execute("DELETE FROM articles WHERE source = ?", (source,))
+                self.db.execute("DELETE FROM files WHERE source = ?", (source,))
+
+    @staticmethod
+    def _key(xml_file):
+        return os.path.abspath(xml_file), os.stat(xml_file).st_mtime
+
+    def _is_cached(self, source, mtime):
+        row = self.db.execute("SELECT mtime, complete FROM files WHERE source = ?", (source,)).fetchone()
+        if row is None or row[0] != mtime or not row[1]:
+            return False
+        with self.db:
+            self.db.execute("UPDATE files SET last_access = ? WHERE source = ?", (time.time(), source))
+        return True
+
+    def _reset(self, source, mtime):
+        with self.db:
+            self.db.execute("DELETE FROM articles WHERE source = ?", (source,))
+            self.db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, 0, 0, ?)", (source, mtime, time.time()))
+
+    def _evict(self, keep=""):
+        total = self.size()
+        lru = self.db.execute("SELECT source, size FROM files WHERE source != ? ORDER BY last_access",
+                              (keep,)).fetchall()
+        for source, size in lru:
+            if total <= self.max_size:
+                break
+            self.invalidate(source)
+            total -= size
@@ -1,10 +1,13 @@
+import functools
+import re
+
 countries = [
 "Afghanistan",
 "Åland Islands",
 "Albania",
 "Algeria",
 "American Samoa",
-"AndorrA",
+"Andorra",
 "Angola",
 "Anguilla",
 "Antarctica",
@@ -177,7 +180,7 @@ countries = [
 "Reunion",
 "Romania",
 "Russian Federation",
-"RWANDA",
+"Rwanda",
 "Saint Helena",
 "Saint Kitts and Nevis",
 "Saint Lucia",
@@ -303,9 +306,9 @@ countries = [
 "الجزائر",
 "دولةالكويت",
 "Magyarország",
-"Қазақста"
-"Қазақия"
-"ҚазақЕлі"
+"Қазақста",
+"Қазақия",
+"ҚазақЕлі",
 "قازاقستان",
 "Казахстан",
 "NewZealand",
@@ -334,8 +337,8 @@ countries = [
 "Srbija",
 "България",
 "Lietuva",
-"Azərbaycan"
-"Азәрбајҹан"
+"Azərbaycan",
+"Азәрбајҹан",
 "آذربايجان",
 "República Dominicana",
 "تونس\u200e",
@@ -371,4 +374,203 @@ countries = [
 "Guinée Équatoriale",
 "Guiné Equatorial",
 "Guinea Ecuatorial"
-]
\ No newline at end of file
+]
+
+
+# alternative names, abbreviations and native names -> name used in `countries`
+aliases = {
+    "USA": "United States",
+    "U.S.A.": "United States",
+    "U.S.A": "United States",
+    "U.S.": "United States",
+    "United States of America": "United States",
+    "UK": "United Kingdom",
+    "U.K.": "United Kingdom",
+    "England": "United Kingdom",
+    "Scotland": "United Kingdom",
+    "Wales": "United Kingdom",
+    "Northern Ireland": "United Kingdom",
+    "Great Britain": "United Kingdom",
+    "P.R. China": "China",
+    "P. R. China": "China",
+    "PR China": "China",
+    "P.R.China": "China",
+    "People's Republic of China": "China",
+    "中国": "China",
+    "South Korea": "Korea",
+    "Republic of Korea": "Korea",
+    "대한민국": "Korea",
+    "Russia": "Russian Federation",
+    "Россия": "Russian Federation",
+    "Vietnam": "Viet Nam",
+    "ViệtNam": "Viet Nam",
+    "Czechia": "Czech Republic",
+    "Českárepublika": "Czech Republic",
+    "The Netherlands": "Netherlands",
+    "Nederland": "Netherlands",
+    "Holland": "Netherlands",
+    "Deutschland": "Germany",
+    "日本": "Japan",
+    "Italia": "Italy",
+    "España": "Spain",
+    "Brasil": "Brazil",
+    "भारत": "India",
+    "México": "Mexico",
+    "Türkiye": "Turkey",
+    "Polska": "Poland",
+    "België": "Belgium",
+    "Belgique": "Belgium",
+    "Belgien": "Belgium",
+    "Suisse": "Switzerland",
+    "Schweiz": "Switzerland",
+    "Svizzera": "Switzerland",
+    "Sverige": "Sweden",
+    "العربيةالسعودية": "Saudi Arabia",
+    "Norge": "Norway",
+    "Österreich": "Austria",
+    "臺灣": "Taiwan",
+    "Ελλάδα": "Greece",
+    "Danmark": "Denmark",
+    "ایران": "Iran",
+    "SouthAfrica": "South Africa",
+    "ประเทศไทย": "Thailand",
+    "Suomi": "Finland",
+    "Éire": "Ireland",
+    "الامارات": "United Arab Emirates",
+    "UAE": "United Arab Emirates",
+    "香港": "Hong Kong",
+    "ישראל": "Israel",
+    "إِسْرَائِيلُ\u200e": "Israel",
+    "România": "Romania",
+    "新加坡": "Singapore",
+    "Украина": "Ukraine",
+    "Україна": "Ukraine",
+    "Pilipinas": "Philippines",
+    "پاکِستان": "Pakistan",
+    "مَصْر": "Egypt",
+    "الجزائر": "Algeria",
+    "دولةالكويت": "Kuwait",
+    "Magyarország": "Hungary",
+    "Қазақста": "Kazakhstan",
+    "Қазақия": "Kazakhstan",
+    "ҚазақЕлі": "Kazakhstan",
+    "قازاقستان": "Kazakhstan",
+    "Казахстан": "Kazakhstan",
+    "NewZealand": "New Zealand",
+    "Perú": "Peru",
+    "قطر": "Qatar",
+    "Slovensko": "Slovakia",
+    "العراق": "Iraq",
+    "Libya": "Libyan Arab Jamahiriya",
+    "ليبيا": "Libyan Arab Jamahiriya",
+    "المغرب\u200e": "Morocco",
+    "বাংলাদেশ": "Bangladesh",
+    "Hrvatska": "Croatia",
+    "Беларусь": "Belarus",
+    "عمان\u200e": "Oman",
+    "السودان": "Sudan",
+    "Syria": "Syrian Arab Republic",
+    "سورية\u200e": "Syrian Arab Republic",
+    "Luxemburg": "Luxembourg",
+    "Lëtzebuerg": "Luxembourg",
+    "Slovenija": "Slovenia",
+    "Srbija": "Serbia and Montenegro",
+    "Serbia": "Serbia and Montenegro",
+    "Montenegro": "Serbia and Montenegro",
+    "България": "Bulgaria",
+    "Lietuva": "Lithuania",
+    "Azərbaycan": "Azerbaijan",
+    "Азәрбајҹан": "Azerbaijan",
+    "آذربايجان": "Azerbaijan",
+    "República Dominicana": "Dominican Republic",
+    "تونس\u200e": "Tunisia",
+    "Tunisie": "Tunisia",
+    "ශ්රීලංකා": "Sri Lanka",
+    "இலங்கை": "Sri Lanka",
+    "Latvija": "Latvia",
+    "CostaRica": "Costa Rica",
+    "لُبْنَان\u200e": "Lebanon",
+    "Liban": "Lebanon",
+    "Ўзбекистон": "Uzbekistan",
+    "Узбекистан": "Uzbekistan",
+    "اليَمَن": "Yemen",
+    "ኢትዮጵያ": "Ethiopia",
+    "Κύπρος": "Cyprus",
+    "Kıbrıs": "Cyprus",
+    "Cameroun": "Cameroon",
+    "Eesti": "Estonia",
+    "Côted’Ivoire": "Cote D'Ivoire",
+    "Côte d'Ivoire": "Cote D'Ivoire",
+    "Ivory Coast": "Cote D'Ivoire",
+    "Panamá": "Panama",
+    "ElSalvador": "El Salvador",
+    "مملكةالبحرين": "Bahrain",
+    "الأردن\u200e": "Jordan",
+    "Guinée Équatoriale": "Equatorial Guinea",
+    "Guiné Equatorial": "Equatorial Guinea",
+    "Guinea Ecuatorial": "Equatorial Guinea",
+    "AndorrA": "Andorra",
+    "RWANDA": "Rwanda",
+}
+
+
+def _trie_pattern(names):
+    """
+    Regular expression matching any of `names`, with common prefixes factored out
+
+    The alternatives are nested as a trie, so the regex engine never tries more
+    than one branch per character and, thanks to greedy optional groups, prefers
+    the longest name ("United States Minor Outlying Islands" over "United States").
+    """
+    trie = {}
+    for name in names:
+        node = trie
+        for char in name:
+            node = node.setdefault(char, {})
+        node[''] = None
+
+    def pattern(node):
+        branches = [re.escape(char) + pattern(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and '' not in node:
+            return branches[0]
+        return '(?:{}){}'.format('|'.join(branches), '?' if '' in node else '')
+
+    return pattern(trie)
+
+
+# matched name -> canonical name
+canonical = {name: aliases.get(name, name) for name in countries}
+canonical.update(aliases)
+
+country_pattern = re.compile(r'(?<!\w){}(?!\w)'.format(_trie_pattern(canonical)))
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def find_country(text):
+    """
+    Find the country named in `text`
+
+    Names are matched as whole words and aliases ("USA", "UK", "P.R. China",
+    native names) are resolved to the name used in `countries`. Affiliations
+    end with the country, so when several names match the last one wins
+    ("New Jersey, USA" is in the United States, not in Jersey).
+
+    :param text: free text, e.g. an affiliation
+    :return: canonical country name or `None`
+    """
+    matches = country_pattern.findall(text)
+    return canonical[matches[-1]] if matches else None
+
+
+def geotag(texts):
+    """
+    Find the country named in each of `texts`, matching every distinct text once
+
+    :param texts: iterable of free texts, e.g. affiliations of many articles
+    :return: list with a canonical country name (or `None`) for each text
+    """
+    texts = list(texts)
+    found = {text: find_country(text) for text in set(texts)}
+    return [found[text] for text in texts]
@@ -0,0 +1,217 @@
+from pubmedpy import iter_articles
+from countries import find_country
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+FORMATS = {"parquet", "arrow"}
+
+SCHEMAS = {
+    "articles": [
+        ("source", "string"),
+        ("pmcid", "string"),
+        ("pmid", "string"),
+        ("doi", "string"),
+        ("type", "string"),
+        ("title", "string"),
+        ("journal_id", "string"),
+        ("journal_title", "string"),
+    ],
+    "authors": [
+        ("pmcid", "string"),
+        ("position", "int32"),
+        ("prefix", "string"),
+        ("given_names", "string"),
+        ("surname", "string"),
+        ("suffix", "string"),
+        ("email", "string"),
+        ("affiliations", "list<string>"),
+    ],
+    "affiliations": [
+        ("pmcid", "string"),
+        ("aid", "string"),
+        ("institution", "string"),
+        ("country", "string"),
+    ],
+    "text": [
+        ("pmcid", "string"),
+        ("section", "string"),
+        ("position", "int32"),
+        ("text", "string"),
+    ],
+    "tables": [
+        ("pmcid", "string"),
+        ("title", "string"),
+        ("rows", "list<list<string>>"),
+        ("header_rows", "int32"),
+    ],
+}
+
+
+def export_files(paths, out_dir, batch_size=1000, format="parquet", backend="etree", recover=False):
+    """
+    Parse xml files and export their articles as columnar files
+
+    Articles are streamed (see `iter_articles`), so memory is bounded by
+    `batch_size` articles whatever the size of the input.
+
+    :param paths: iterable of paths accepted by `iter_articles`
+    :param out_dir: directory where the exported files are written
+    :param batch_size: number of articles buffered before being written out
+    :param format: `parquet` or `arrow` (Arrow IPC file)
+    :param backend: xml parser, one of `pubmedpy.BACKENDS` (see `iter_articles`)
+    :param recover: parse malformed xml as far as possible rather than raise. Requires `backend="lxml"`
+    :return: dict mapping each exported table to its path
+    """
+    def articles():
+        for path in paths:
+            for source, article in iter_articles(path, with_path=True, stream=True, backend=backend, recover=recover):
+                yield source, article
+
+    return export_articles(articles(), out_dir, batch_size=batch_size, format=format)
+
+
+def export_articles(articles, out_dir, batch_size=1000, format="parquet"):
+    """
+    Export parsed articles as columnar Parquet or Arrow files
+
+    Five tables are written to `out_dir`, all keyed by `pmcid`:
+
+    - `articles`: identifiers, type, title and journal of each article
+    - `authors`: one row per author, with the ids of their affiliations
+    - `affiliations`: one row per affiliation, with the country found in it
+    - `text`: flattened body text (see `Article.get_flat_text`), one row per
+      text element, with the main section it belongs to
+    - `tables`: one row per table, with its cells as a list of rows and the
+      number of leading header rows
+
+    Rows are buffered and written every `batch_size` articles, as row groups
+    (Parquet) or record batches (Arrow).
+
+    :param articles: iterable of `Article` or of `(source, Article)` tuples, as
+        yielded by `iter_articles(..., with_path=True)`
+    :param out_dir: directory where the exported files are written
+    :param batch_size: number of articles buffered before being written out
+    :param format: `parquet` or `arrow` (Arrow IPC file)
+    :return: dict mapping each exported table to its path
+    """
+    if pa is None:
+        raise ImportError("Exporting articles requires pyarrow (pip install pyarrow)")
+    if format not in FORMATS:
+        raise ValueError("Accepted values for format {}; got {}".format(FORMATS, format))
+
+    os.makedirs(out_dir, exist_ok=True)
+    ext = ".parquet" if format == "parquet" else ".arrow"
+    paths = {name: os.path.join(out_dir, name + ext) for name in SCHEMAS}
+    schemas = {name: _schema(fields) for name, fields in SCHEMAS.items()}
+
+    writers = {}
+    try:
+        for name in SCHEMAS:
+            if format == "parquet":
+                writers[name] = pq.ParquetWriter(paths[name], schemas[name])
+            else:
+                writers[name] = pa.ipc.new_file(paths[name], schemas[name])
+
+        buffers = _new_buffers()
+        buffered = 0
+        for article in articles:
+            source, article = article if isinstance(article, tuple) else (None, article)
+            _add_article(buffers, source, article)
+            buffered += 1
+
+            if buffered == batch_size:
+                _flush(buffers, writers, schemas)
+                buffers = _new_buffers()
+                buffered = 0
+
+        if buffered:
+            _flush(buffers, writers, schemas)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    return paths
+
+
+def _schema(fields):
+    types = {
+        "string": pa.string(),
+        "int32": pa.int32(),
+        "list<string>": pa.list_(pa.string()),
+        "list<list<string>>": pa.list_(pa.list_(pa.string())),
+    }
+    return pa.schema([(name, types[dtype]) for name, dtype in fields])
+
+
+def _new_buffers():
+    return {name: {column: [] for column, _ in fields} for name, fields in SCHEMAS.items()}
+
+
+def _flush(buffers, writers, schemas):
+    for name, columns in buffers.items():
+        batch = pa.RecordBatch.from_pydict(columns, schema=schemas[name])
+        if isinstance(writers[name], pq.ParquetWriter):
+            writers[name].write_table(pa.Table.from_batches([batch]))
+        else:
+            writers[name].write_batch(batch)
+
+
+def _append(columns, **row):
+    for column, value in row.items():
+        columns[column].append(value)
+
+
+def _add_article(buffers, source, article):
+    journal, metadata = article.front if article.front is not None else (None, None)
+    pmcid = metadata.pmcid if metadata is not None else None
+
+    _append(buffers["articles"],
+            source=source,
+            pmcid=pmcid,
+            pmid=metadata.pmid if metadata is not None else None,
+            doi=metadata.doi if metadata is not None else None,
+            type=article.type,
+            title=metadata.title if metadata is not None else None,
+            journal_id=journal.jid if journal is not None else None,
+            journal_title=journal.title if journal is not None else None)
+
+    authors = metadata.authors if metadata is not None and metadata.authors is not None else []
+
+    affiliations = {}
+    for position, author in enumerate(authors):
+        name = author.name
+        for affiliation in author.affiliations or []:
+            if affiliation is not None:
+                affiliations[id(affiliation)] = affiliation
+        _append(buffers["authors"],
+                pmcid=pmcid,
+                position=position,
+                prefix=name.prefix if name is not None else None,
+                given_names=name.given_names if name is not None else None,
+                surname=name.surname if name is not None else None,
+                suffix=name.suffix if name is not None else None,
+                email=author.email,
+                affiliations=[a.aid for a in author.affiliations or [] if a is not None and a.aid is not None])
+
+    for affiliation in affiliations.values():
+        institution = ' '.join(filter(None, affiliation.institution or []))
+        _append(buffers["affiliations"],
+                pmcid=pmcid,
+                aid=affiliation.aid,
+                institution=institution,
+                country=find_country(institution))
+
+    if article.body is not None:
+        for section in article.body:
+            for position, text in enumerate(section.get_content(flatten=True, text=True)):
+                _append(buffers["text"], pmcid=pmcid, section=section.title, position=position, text=text)
+
+        for table in article.get_tables():
+            _append(buffers["tables"], pmcid=pmcid, title=table.title, rows=table.rows,
+                    header_rows=table.header_rows)
+
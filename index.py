@@ -0,0 +1,202 @@
+from pubmedpy import _iter_article_chunks, _parse_front_chunk
+from article import Article
+import xml.etree.ElementTree as et
+import blockgzip
+import gzip
+import os
+import sqlite3
+
+
+def build_index(xml_file, index_file=None, rewrite=None):
+    """
+    Index the byte offset of every `<article>` of a bundle file, by PMCID, PMID and DOI
+
+    Plain `.xml` bundles are indexed in place. A regular gzip file cannot be
+    entered at an arbitrary offset, so `.gz` bundles are first rewritten as a
+    blocked gzip file (see `blockgzip`) in which each `<article>` is its own gzip
+    member; the rewritten file is still a valid `.gz` bundle for `iter_articles`
+    and it is the one that gets indexed. Bundles that already are blocked gzip
+    files are indexed in place.
+
+    :param xml_file: path to an xml or gzip'd bundle
+    :param index_file: path of the SQLite index. Defaults to the indexed file plus `.idx`
+    :param rewrite: path of the rewritten blocked gzip file. Defaults to `xml_file`
+        with `.xml.gz` replaced by `.blocked.xml.gz`
+    :return: `ArticleIndex` over the indexed file
+    """
+    if xml_file.endswith(".xml"):
+        data_file, compressed = xml_file, False
+        with open(xml_file, "rb") as f:
+            entries = [(offset, len(chunk), _parse_front_chunk(chunk)) for offset, chunk in _iter_article_chunks(f)]
+    elif xml_file.endswith((".gz", ".gzip")):
+        compressed = True
+        if blockgzip.is_blocked(xml_file):
+            data_file = xml_file
+            entries = _index_blocked(xml_file)
+        else:
+            data_file = rewrite if rewrite is not None else _blocked_name(xml_file)
+            entries = _rewrite_blocked(xml_file, data_file)
+    else:
+        raise ValueError("Expecting file extension xml, gz or gzip. Got {}".format(os.path.splitext(xml_file)[-1]))
+
+    index_file = index_file if index_file is not None else data_file + ".idx"
+    if os.path.exists(index_file):
+        os.remove(index_file)
+
+    db = sqlite3.connect(index_file)
+    with db:
+        db.executescript("""
+            CREATE TABLE meta (data_file TEXT, compressed INTEGER, mtime REAL);
+            CREATE TABLE articles (pmcid TEXT, pmid TEXT, doi TEXT, offset INTEGER, length INTEGER);
+        """)
+        db.execute("INSERT INTO meta VALUES (?, ?, ?)",
+                   (os.path.abspath(data_file), compressed, os.stat(data_file).st_mtime))
+        db.executemany("INSERT INTO articles VALUES (?, ?, ?, ?, ?)", [
+            (meta.pmcid, meta.pmid, meta.doi, offset, length)
+            for offset, length, meta in ((o, l, front.article_meta) for o, l, front in entries)
+            if meta is not None
+        ])
+        db.executescript("""
+            CREATE INDEX articles_pmcid ON articles (pmcid);
+            CREATE INDEX articles_pmid ON articles (pmid);
+            CREATE INDEX articles_doi ON articles (doi);
+        """)
+    db.close()
+
+    return ArticleIndex(index_file)
+
+
+def get_article(xml_file, pmcid=None, pmid=None, doi=None, parse=True):
+    """
+    Fetch a single article from a bundle indexed with `build_index`, using the default index location
+
+    :param xml_file: path of the indexed (or rewritten) bundle
+    :return: `Article` or `ElementTree.Element`, `None` if the article is not in the bundle
+    """
+    with ArticleIndex(xml_file + ".idx") as index:
+        return index.get_article(pmcid=pmcid, pmid=pmid, doi=doi, parse=parse)
+
+
+class ArticleIndex(object):
+    """
+    Random access to the articles of a bundle through an index built by `build_index`
+
+    Looking an article up costs one indexed query, one seek and the parsing of
+    that single article, whatever its position in the bundle.
+    """
+    def __init__(self, index_file):
+        self.index_file = index_file
+        self.db = sqlite3.connect(index_file)
+        self.data_file, self.compressed, mtime = self.db.execute("SELECT * FROM meta").fetchone()
+        if os.stat(self.data_file).st_mtime != mtime:
+            raise ValueError("{} changed since it was indexed, rebuild the index".format(self.data_file))
+        self.f = open(self.data_file, "rb")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def __repr__(self):
+        return "ArticleIndex(data_file='{}', articles={})".format(self.data_file, len(self))
+
+    def close(self):
+        self.f.close()
+        self.db.close()
+
+    def get_article(self, pmcid=None, pmid=None, doi=None, parse=True):
+        """
+        Fetch the article with the given PMCID, PMID or DOI
+
+        :param parse: return `ElementTree` (`False`) or `Article` (`True`) object
+        :return: `Article` or `ElementTree.Element`, `None` if the article is not indexed
+        """
+        for column, value in (("pmcid", pmcid), ("pmid", pmid), ("doi", doi)):
+            if value is not None:
+                row = self.db.execute("SELECT offset, length FROM articles WHERE {} = ?".format(column),
+                                      (value,)).fetchone()
+                break
+        else:
+            raise ValueError("Expecting one of pmcid, pmid or doi")
+
+        if row is None:
+            return None
+
+        self.f.seek(row[0])
+        chunk = self.f.read(row[1])
+        if self.compressed:
+            chunk = blockgzip.decompress_member(chunk)
+
+        elem = et.fromstring(chunk)
+        return Article(elem) if parse is True else elem
+
+
+def _blocked_name(xml_file):
+    base = xml_file[:-len(".gzip")] if xml_file.endswith(".gzip") else xml_file[:-len(".gz")]
+    base = base[:-len(".xml")] if base.endswith(".xml") else base
+    return base + ".blocked.xml.gz"
+
+
+def _rewrite_blocked(xml_file, data_file):
+    """
+    Rewrite a gzip'd bundle as blocked gzip, one member per `<article>` and one per gap between articles
+
+    :return: `(offset, length, front)` of each article member in `data_file`
+    """
+    entries = []
+    with gzip.open(xml_file) as gz, open(data_file, "wb") as out:
+        f = _Recorder(gz)
+        position = 0
+        for start, chunk in _iter_article_chunks(f):
+            gap = f.recorded(position, start)
+            if gap:
+                out.write(blockgzip.compress_member(gap))
+
+            member = blockgzip.compress_member(chunk)
+            entries.append((out.tell(), len(member), _parse_front_chunk(chunk)))
+            out.write(member)
+            position = start + len(chunk)
+
+        tail = f.recorded(position, None)
+        if tail:
+            out.write(blockgzip.compress_member(tail))
+    return entries
+
+
+def _index_blocked(xml_file):
+    entries = []
+    with open(xml_file, "rb") as f:
+        for offset, member in blockgzip.iter_members(f):
+            chunk = blockgzip.decompress_member(member)
+            if chunk.startswith(b"<article") and chunk.endswith(b"</article>"):
+                entries.append((offset, len(member), _parse_front_chunk(chunk)))
+    return entries
+
+
+class _Recorder(object):
+    """
+    Binary stream wrapper keeping the bytes read from `f` until they are claimed with `recorded`
+    """
+    def __init__(self, f):
+        self.f = f
+        self.data = bytearray()
+        self.base = 0
+
+    def read(self, size=-1):
+        block = self.f.read(size)
+        self.data += block
+        return block
+
+    def recorded(self, start, end):
+        """
+        :return: the bytes in `[start, end)` of the stream, forgetting everything before `end`
+        """
+        end = self.base + len(self.data) if end is None else end
+        block = bytes(self.data[start - self.base:end - self.base])
+        del self.data[:end - self.base]
+        self.base = end
+        return block
@@ -1,30 +1,61 @@
 import xml.etree.ElementTree as et
-from article import Article
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from collections import deque
+from article import Article, ArticleFilter, Front, ParseStats
 from urllib import request
+from urllib.parse import urljoin, urlsplit
 import argparse
+import calendar
+import datetime
+import glob
+import ftplib
+import hashlib
+import http.client
 import sys
 import time
+import blockgzip
+import bz2
 import gzip
+import itertools
+import json
+import tarfile
+import threading
 import os
+import queue
 import re
 import warnings
 
 DBs = {"epmc", "pmc"}
 USEs = {"comm", "non_comm", "any"}
+BACKENDS = ("etree", "lxml")
 
-def parse_article(xml_file, parse=True):
+def parse_article(xml_file, parse=True, member=None, lazy=False, backend="etree"):
     """
     Parse the first <article> element found in an xml file
 
-    :param xml_file: path to xml file. Supports gzip'd files
+    :param xml_file: path to xml file. Supports gzip'd files and tar.gz archives
     :param parse: return `ElementTree` (`False`) or `Article` (`True`) object
+    :param member: path of the archive member to parse when `xml_file` is a tar.gz
+        archive. Defaults to the first xml member
+    :param lazy: build the parts of the `Article` only when first accessed
+    :param backend: xml parser, one of `BACKENDS` (see `iter_articles`)
     :return: alwasy one parsed article as `ElementTree` or `Article` object
     """
-    for article in iter_articles(xml_file, parse=parse):
-        return article
+    if backend not in BACKENDS:
+        raise ValueError("Accepted values for backend {}; got {}".format(BACKENDS, backend))
 
+    for path, f in _iter_xml_sources(xml_file):
+        # other members are skipped unparsed
+        if member is not None and path != member:
+            continue
+        for article in _iterparse_articles(f, parse=parse, lazy=lazy, backend=backend):
+            return article
+        if member is not None:
+            return None
 
-def iter_articles(xml_file, parse=True):
+
+def iter_articles(xml_file, parse=True, stream=False, with_path=False, lazy=False, keep_xml=True, threads=0,
+                  stats=None, backend="etree", recover=False, where=None, sections=None):
     """
     Yield either parsed or raw `<article>` elements
 
@@ -32,23 +63,571 @@ def iter_articles(xml_file, parse=True):
     `article.Article` or `ElementTree.Element` object. Works with xml files
     both bearing single or multiple `<article>` elements.
 
-    :param xml_file: path to xml file. Supports gzip'd files
+    PMC `oa_bulk` archives (`.tar.gz`, `.tgz`) are read member by member
+    straight out of the compressed stream, without extracting them to disk.
+    Every `.xml` or `.nxml` member is parsed as an xml file.
+
+    Every `<article>` is detached from its parent (together with any preceding
+    sibling) once the consumer asks for the next one, so the document root never
+    accumulates processed articles. As long as the consumer does not retain the
+    yielded objects, peak memory is bounded by the largest single article rather
+    than by the size of the file.
+
+    With `stream=True` the yielded `<article>` element is also cleared when the
+    consumer advances: retained `Article` objects keep their parsed content but
+    their `xml` attribute is emptied, and retained raw elements are emptied too.
+    Use it to walk multi-GB bundles in constant memory.
+
+    With `threads > 0` decompression runs in background threads, overlapping
+    with parsing; blocked gzip bundles (e.g. rewritten by `index.build_index`)
+    are decompressed `threads` members at a time.
+
+    Give an `article.ParseStats` as `stats` to profile parsing: it accumulates
+    the tokenizing time of each article and the bytes read on top of what
+    `Article` records, and its `callback` is called with every article and its own stats.
+
+    The xml is parsed by the standard library (`backend="etree"`) or by lxml
+    (`backend="lxml"`, requires the `lxml` package). lxml only reports the
+    `<article>` elements, accepts documents of any size and depth, and with
+    `recover=True` reads what it can of malformed xml instead of raising.
+    Articles are the same whatever the backend, but raw elements are those of
+    the backend. lxml tokenizes faster, but its elements are slower to walk
+    from Python, so it pays off with `parse=False` or to recover broken files.
+
+    `where` selects articles on their type, journal, PMCID and publication date
+    (see `article.ArticleFilter`), e.g. `where={"type": "research-article",
+    "since": 2018}`. Articles are matched on their `<article>` attributes and
+    `<front>` only, so the body of rejected articles is never parsed.
+    `sections` likewise restricts the parsed body to some sections, see
+    `article.Article`.
+
+    :param xml_file: path to xml file. Supports gzip, bzip2 and zstandard compressed
+        files and tar archives
     :param parse: return `ElementTree` (`False`) or `Article` (`True`) object
+    :param stream: clear each `<article>` element once the consumer is done with it
+    :param with_path: yield `(path, article)` tuples, where `path` is the archive
+        member the article comes from, or `xml_file` itself for plain files
+    :param lazy: build the parts of each `Article` only when first accessed (see `Article`)
+    :param keep_xml: keep a reference to the source xml in every node of each `Article`
+    :param threads: number of decompression threads. `0` decompresses in the calling thread
+    :param stats: optional `ParseStats` collecting per-stage times and counters
+    :param backend: xml parser, one of `BACKENDS`
+    :param recover: parse malformed xml as far as possible rather than raise. Requires `backend="lxml"`
+    :param where: `article.ArticleFilter`, or dict of its arguments, selecting the articles to yield
+    :param sections: titles or compiled patterns of the top-level sections to parse, see `article.Article`
     :return: parsed article as `ElementTree` or `Article` object
     """
+    if backend not in BACKENDS:
+        raise ValueError("Accepted values for backend {}; got {}".format(BACKENDS, backend))
+    if recover is True and backend != "lxml":
+        raise ValueError("recover requires the lxml backend")
+    if isinstance(where, dict):
+        where = ArticleFilter(**where)
+
+    for path, f in _iter_xml_sources(xml_file, threads=threads):
+        for article in _iterparse_articles(f, parse=parse, stream=stream, lazy=lazy, keep_xml=keep_xml, stats=stats,
+                                           backend=backend, recover=recover, where=where, sections=sections):
+            yield (path, article) if with_path is True else article
+
+
+def iter_metadata(xml_file, with_path=False, threads=0):
+    """
+    Yield the `article.Front` (journal and article metadata) of every `<article>` in a file
+
+    Made for author, affiliation, journal and identifier harvesting. Each
+    `<article>` is located with a byte scan and only the bytes up to its
+    `</front>` are handed to the xml parser: `<body>`, `<back>` and anything
+    else after the front matter are never tokenized. Articles must declare the
+    namespaces they use on their own `<article>` element, as in Europe PMC bundles
+    and PMC archives.
+
+    `Front` objects unpack into their journal and article metadata::
+
+        for journal, metadata in iter_metadata("bundle.xml.gz"):
+            print(journal.jid, metadata.pmcid, metadata.authors)
+
+    :param xml_file: path to xml file, compressed or archived as accepted by `iter_articles`
+    :param with_path: yield `(path, front)` tuples, as in `iter_articles`
+    :param threads: number of decompression threads, as in `iter_articles`
+    :return: `Front` objects, with both metadata `None` for articles without front matter
+    """
+    for path, f in _iter_xml_sources(xml_file, threads=threads):
+        for _, chunk in _iter_article_chunks(f):
+            front = _parse_front_chunk(chunk)
+            yield (path, front) if with_path is True else front
 
+
+def _parse_front_chunk(chunk):
+    """
+    Parse the `<front>` of a `<article>...</article>` byte chunk without tokenizing the rest
+    """
+    end = chunk.find(b'</front>')
+    if end == -1:
+        return Front()
+    article = et.fromstring(chunk[:end + len(b'</front>')] + b'</article>')
+    return Front(article.find("front"))
+
+
+def _iter_xml_sources(xml_file, fileobj=None, threads=0):
+    """
+    Yield `(path, file object)` pairs for every xml document stored in `xml_file`
+
+    Plain and compressed (gzip, bzip2 or zstandard) files are a single source.
+    Tar archives (`.tar.gz`, `.tgz`, `.tar.bz2`, `.tar.zst`, ...) are opened in
+    stream mode, so members are decompressed one at a time in archive order and
+    each file object is only valid until the next pair is requested.
+
+    If `fileobj` is given the (possibly compressed) content is read from it
+    instead of opening `xml_file`, which is then only used for its extension.
+    `fileobj` is only read sequentially, so it may be a network stream.
+
+    See `_open_xml` for `threads`.
+    """
+    base, ext = os.path.splitext(xml_file)
+    if ext not in _extensions:
+        raise ValueError("Expecting file extension xml, gz, gzip, bz2, zst, tar.gz or tgz. Got {}".format(ext))
+
+    with _open_xml(xml_file, fileobj, threads) as f:
+        if ext in (".tar", ".tgz", ".tbz2") or base.endswith(".tar"):
+            with tarfile.open(fileobj=f, mode="r|") as tar:
+                for member in tar:
+                    if member.isfile() and member.name.endswith((".xml", ".nxml")):
+                        yield member.name, tar.extractfile(member)
+        else:
+            yield xml_file, f
+
+
+_extensions = {".xml", ".tar", ".gz", ".gzip", ".tgz", ".bz2", ".tbz2", ".zst"}
+
+
+def _open_xml(xml_file, fileobj=None, threads=0):
+    """
+    Open the decompressed content of `xml_file` (or of `fileobj`) as a binary stream
+
+    With `threads=0` decompression happens inline, in the thread that reads the
+    stream. With `threads > 0` it is pipelined with parsing: a background thread
+    decompresses up to a few MB ahead of the reader. Blocked gzip files (see
+    `blockgzip`) read from disk are instead decompressed member by member over
+    `threads` threads. zlib, bz2 and zstandard release the GIL while they
+    decompress, so threads do overlap with parsing.
+
+    zstandard files require the `zstandard` package. A `fileobj` given by the
+    caller is never closed by closing the returned stream.
+    """
     ext = os.path.splitext(xml_file)[-1]
-    if ext == ".xml":
-        open_f = open
-    elif ext == (".gz" or ".gzip"):
-        open_f = gzip.open
+    source = xml_file if fileobj is None else fileobj
+
+    if ext in (".xml", ".tar"):
+        return open(xml_file, "rb") if fileobj is None else _UnclosedReader(fileobj)
+    if ext in (".gz", ".gzip", ".tgz"):
+        if threads > 0 and fileobj is None and blockgzip.is_blocked(xml_file):
+            return _BlockReader(_iter_blocked_members(open(xml_file, "rb"), threads))
+        f = gzip.open(source)
+    elif ext in (".bz2", ".tbz2"):
+        f = bz2.open(source)
     else:
-        raise ValueError("Expecting file extension xml, gz or gzip. Got {}".format(ext))
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("Reading zstandard files requires zstandard (pip install zstandard)")
+        raw = open(xml_file, "rb") if fileobj is None else fileobj
+        f = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=fileobj is None)
+
+    return _BlockReader(_prefetch(_iter_blocks(f))) if threads > 0 else f
+
+
+def _iter_blocks(f, block_size=1 << 20):
+    with f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            yield block
+
+
+def _iter_blocked_members(f, threads):
+    """
+    Yield the decompressed members of a blocked gzip file in order, decompressing up to `2 * threads` at once
+    """
+    with f, ThreadPoolExecutor(max_workers=threads) as executor:
+        pending = deque()
+        for _, member in blockgzip.iter_members(f):
+            pending.append(executor.submit(blockgzip.decompress_member, member))
+            if len(pending) > 2 * threads:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _prefetch(blocks, depth=8):
+    """
+    Consume the `blocks` iterator in a background thread, at most `depth` blocks ahead of the caller
+    """
+    ready = queue.Queue(depth)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                ready.put(item, timeout=.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for block in blocks:
+                if not put(block):
+                    break
+            else:
+                put(None)
+        except Exception as e:
+            put(e)
+        finally:
+            blocks.close()
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = ready.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+class _BlockReader(object):
+    """
+    Read-only binary file object over an iterator of byte blocks
+    """
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.block = b''
+        self.pos = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def read(self, size=-1):
+        parts = []
+        while size != 0:
+            if self.pos == len(self.block):
+                self.block = next(self.blocks, b'')
+                self.pos = 0
+                if not self.block:
+                    break
+            end = len(self.block) if size < 0 else min(len(self.block), self.pos + size)
+            parts.append(self.block[self.pos:end])
+            if size > 0:
+                size -= end - self.pos
+            self.pos = end
+        return b''.join(parts)
+
+    def close(self):
+        self.blocks.close()
+
+
+def _iterparse_articles(f, parse=True, stream=False, lazy=False, keep_xml=True, stats=None, backend="etree",
+                        recover=False, where=None, sections=None):
+    """
+    Incrementally parse an open xml file object and yield its `<article>` elements
+
+    Articles rejected by `where` are skipped before anything is built.
+    """
+    if stats is not None:
+        f = _CountingReader(f)
+        start, nbytes = time.perf_counter(), 0
+
+    iterparse = _iterparse_lxml if backend == "lxml" else _iterparse_etree
+    for elem in iterparse(f, stream, recover):
+        if where is not None and not where.match(elem):
+            if stats is not None:
+                # rejected articles are not counted, nor charged to the next one
+                start, nbytes = time.perf_counter(), f.nbytes
+            continue
+        if stats is None:
+            yield Article(elem, lazy=lazy, keep_xml=keep_xml, sections=sections) if parse is True else elem
+        else:
+            record = ParseStats()
+            record.add_time("tokenize", time.perf_counter() - start)
+            # the parser reads the input in blocks: bytes are only meaningful summed over many articles
+            stats.nbytes, nbytes = stats.nbytes + f.nbytes - nbytes, f.nbytes
+            if parse is True:
+                article = Article(elem, lazy=lazy, keep_xml=keep_xml, stats=record, sections=sections)
+            else:
+                article = elem
+                record.articles += 1
+            stats.update(record)
+            if stats.callback is not None:
+                stats.callback(article, record)
+
+            yield article
+            start = time.perf_counter()
+
+
+def _iterparse_etree(f, stream=False, recover=False):
+    """
+    Yield the `<article>` elements of an open xml file object, parsed by `xml.etree.ElementTree`
+
+    Keeps a stack of the currently open elements so that, after each yield, the
+    processed `<article>` and its preceding siblings can be dropped from their
+    parent whatever the depth of the `<article>` in the document.
+    """
+    parents = []
+    for event, elem in et.iterparse(f, events=("start", "end")):
+        if event == 'start':
+            parents.append(elem)
+            continue
+
+        parents.pop()
+        if elem.tag == 'article':
+            yield elem
+
+            if stream is True:
+                elem.clear()
+            if parents:
+                del parents[-1][:]
+
+
+def _iterparse_lxml(f, stream=False, recover=False):
+    """
+    Yield the `<article>` elements of an open xml file object, parsed by `lxml`
+
+    lxml only reports `<article>` end events and keeps parent links, so no stack
+    of open elements is needed. Comments and processing instructions are dropped
+    as `xml.etree.ElementTree` does, so that both backends build the same trees.
+    Malformed xml raises `xml.etree.ElementTree.ParseError` too, with the error
+    code of libxml2.
+    """
+    try:
+        from lxml import etree
+    except ImportError:
+        raise ImportError("The lxml backend requires lxml (pip install lxml)")
+
+    try:
+        for _, elem in etree.iterparse(f, events=("end",), tag="article", huge_tree=True, recover=recover,
+                                       remove_comments=True, remove_pis=True):
+            yield elem
+
+            if stream is True:
+                elem.clear()
+            parent = elem.getparent()
+            if parent is not None:
+                del parent[:]
+    except etree.XMLSyntaxError as e:
+        error = et.ParseError(str(e))
+        error.code, error.position = e.code, e.position
+        raise error
+
+
+class _UnclosedReader(object):
+    """
+    Read-only file object reading from `fileobj`, which closing it leaves open
+    """
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def read(self, size=-1):
+        return self.fileobj.read(size)
+
+    def close(self):
+        pass
+
+
+class _CountingReader(object):
+    """
+    Read-only file object counting the bytes read from `fileobj`
+    """
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.nbytes = 0
+
+    def read(self, size=-1):
+        data = self.fileobj.read(size)
+        self.nbytes += len(data)
+        return data
+
+
+def _iter_article_chunks(f, blocksize=1 << 20):
+    """
+    Yield `(offset, bytes)` for every `<article>...</article>` found in a binary stream
+
+    This is a plain byte scan, no xml parsing is involved: `offset` is the position
+    of the `<article` tag in the (decompressed) stream. Chunks are expected to be
+    self-contained documents, i.e. namespaces used inside an `<article>` must be
+    declared on the `<article>` element itself, as in Europe PMC bundles.
+    """
+    buf = b''
+    offset = 0
+    while True:
+        block = f.read(blocksize)
+        buf += block
+
+        pos = 0
+        while True:
+            start = _article_start.search(buf, pos)
+            if start is None:
+                pos = max(pos, len(buf) - len(b'<article'))
+                break
+            end = buf.find(b'</article>', start.end())
+            if end == -1:
+                pos = start.start()
+                break
+            end += len(b'</article>')
+            yield offset + start.start(), buf[start.start():end]
+            pos = end
+
+        offset += pos
+        buf = buf[pos:]
+        if not block:
+            break
+
+
+_article_start = re.compile(rb'<article[\s>]')
+
+
+class WorkerStats(object):
+    """
+    Per-worker throughput of a `parse_many` run
+
+    `workers` maps the process id of every worker to a dict counting the
+    `articles` it parsed, the decompressed xml `bytes` it parsed and the
+    `seconds` it spent parsing, so throughputs compare across compressions
+    and with `split=True` or not.
+    """
+    def __init__(self):
+        self.workers = {}
+
+    def __repr__(self):
+        return "WorkerStats({})".format(self.workers)
+
+    def update(self, pid, articles, nbytes, seconds):
+        worker = self.workers.setdefault(pid, {"articles": 0, "bytes": 0, "seconds": 0.})
+        worker["articles"] += articles
+        worker["bytes"] += nbytes
+        worker["seconds"] += seconds
+
+    def throughput(self):
+        """
+        :return: dict mapping each worker pid to its `(articles/s, MB/s)`
+        """
+        return {pid: (w["articles"] / w["seconds"], w["bytes"] / (1024 * 1024 * w["seconds"]))
+                for pid, w in self.workers.items() if w["seconds"] > 0}
+
+
+def _parse_file_job(xml_file, parse):
+    start = time.perf_counter()
+    nbytes, articles = 0, []
+    for path, f in _iter_xml_sources(xml_file):
+        # decompressed bytes, as counted by chunk jobs
+        f = _CountingReader(f)
+        articles.extend((path, article.to_bytes() if parse is True else article)
+                        for article in _iterparse_articles(f, parse=parse, keep_xml=False))
+        nbytes += f.nbytes
+    return os.getpid(), nbytes, time.perf_counter() - start, articles
+
+
+def _parse_chunks_job(path, chunks, parse):
+    start = time.perf_counter()
+    articles = [(path, Article(et.fromstring(c), keep_xml=False).to_bytes() if parse is True else et.fromstring(c))
+                for c in chunks]
+    return os.getpid(), sum(map(len, chunks)), time.perf_counter() - start, articles
+
+
+def _iter_jobs(paths, split, batch_size, threads=0):
+    """
+    Yield `(function, args)` work units for `parse_many`
+    """
+    for path in paths:
+        if split is not True:
+            yield _parse_file_job, (path,)
+            continue
+
+        for member, f in _iter_xml_sources(path, threads=threads):
+            batch = []
+            for _, chunk in _iter_article_chunks(f):
+                batch.append(chunk)
+                if len(batch) == batch_size:
+                    yield _parse_chunks_job, (member, batch)
+                    batch = []
+            if batch:
+                yield _parse_chunks_job, (member, batch)
+
+
+def parse_many(paths, workers=None, ordered=True, split=False, batch_size=64,
+               parse=True, with_path=False, stats=None, threads=0):
+    """
+    Parse many xml files over a pool of processes
+
+    Files are fanned out to `workers` processes and parsed articles are yielded
+    as soon as their work unit is done. At most twice as many work units as
+    workers are in flight at any time, so memory stays bounded however many
+    files are given.
+
+    With `split=True` each file is instead cut into byte-ranges of at most
+    `batch_size` `<article>` elements by the calling process (see
+    `_iter_article_chunks`), so a single large bundle is spread over the whole
+    pool too. The calling process only decompresses and scans bytes; all xml
+    parsing happens in the workers, and with `threads > 0` decompression is
+    pipelined with that scan (see `iter_articles`).
+
+    Parsed articles are sent back from the workers serialized with
+    `Article.to_bytes`, i.e. without their source xml.
+
+    :param paths: iterable of paths accepted by `iter_articles`
+    :param workers: number of worker processes. Defaults to `os.cpu_count()`
+    :param ordered: yield articles in input order (`True`) or as soon as they are ready (`False`)
+    :param split: split files into batches of articles instead of sending whole files to workers
+    :param batch_size: maximum number of articles per work unit when `split=True`
+    :param parse: return `ElementTree` (`False`) or `Article` (`True`) object
+    :param with_path: yield `(path, article)` tuples, as in `iter_articles`
+    :param stats: optional `WorkerStats` collecting per-worker throughput
+    :param threads: number of decompression threads of the calling process when `split=True`
+    :return: parsed articles as `ElementTree` or `Article` objects
+    """
+    workers = workers or os.cpu_count() or 1
+    jobs = _iter_jobs(paths, split, batch_size, threads)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for func, args in itertools.islice(jobs, 2 * workers):
+            pending.append(executor.submit(func, *args, parse))
+
+        while pending:
+            if ordered is True:
+                done = [pending.popleft()]
+                done[0].result()
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
 
-    with open_f(xml_file) as f:
-        for event, elem in et.iterparse(f, events=("end",)):
-            if event == 'end' and elem.tag == 'article':
-                yield Article(elem) if parse is True else elem
+            for future in done:
+                pid, nbytes, seconds, articles = future.result()
+                if stats is not None:
+                    stats.update(pid, len(articles), nbytes, seconds)
+
+                for func, args in itertools.islice(jobs, 1):
+                    pending.append(executor.submit(func, *args, parse))
+
+                for path, article in articles:
+                    article = Article.from_bytes(article) if parse is True else article
+                    yield (path, article) if with_path is True else article
 
 
 def reporthook(count, block_size, total_size):
@@ -71,9 +650,211 @@ def reporthook(count, block_size, total_size):
     sys.stdout.flush()
 
 
-def bulk_download_articles(db, n=None, use=None, download_dir=None, progress=True):
-    reportfunc = reporthook if progress is True else None
+def bulk_download_articles(db, n=None, use=None, download_dir=None, progress=True, workers=1, retries=5):
+    """
+    Mirror OA article bundles from PMC or Europe PMC
+
+    Up to `workers` files are transferred at the same time, each thread reusing
+    its own connection to the server. Files whose size and modification time
+    already match the remote listing are skipped. Transfers are written to a
+    `.part` file that is resumed (HTTP `Range` / FTP `REST`) after a failure or on
+    the next run, and failed transfers are retried with exponential backoff.
+
+    :param db: download from `pmc` or `epmc`
+    :param n: download at most the first `n` files of the listing
+    :param use: license subset to download from pmc: `comm`, `non_comm` or `any`
+    :param download_dir: directory in which files are saved. Defaults to the current directory
+    :param progress: report download progress on stdout
+    :param workers: number of parallel transfers
+    :param retries: number of times a failed transfer is retried before giving up
+    :return: list of paths of the files that were downloaded
+    """
+    baseurl, entries = _remote_listing(db, use)
+    entries = entries[:n] if n is not None else entries
+
+    downloads = _iter_downloads(baseurl, entries, download_dir, progress, workers, retries)
+    return [path for _, path, transferred in downloads if transferred]
+
+
+def bulk_iter_articles(db, n=None, use=None, download_dir=None, parse=True, stream=False, with_path=False):
+    """
+    Yield articles from OA bundles while they are being downloaded
+
+    Each bundle of the remote listing is decompressed and parsed straight from
+    the network response, so articles are yielded while the transfer is still in
+    flight and network and parsing time overlap. Bundles are processed one after
+    the other.
+
+    If `download_dir` is given every bundle is also teed to disk as it is read,
+    first to a `.part` file that is renamed once the bundle has been fully
+    consumed. A bundle abandoned half-way leaves its `.part` file behind, which
+    `bulk_download_articles` resumes.
+
+    :param db: download from `pmc` or `epmc`
+    :param n: process at most the first `n` files of the listing
+    :param use: license subset to download from pmc: `comm`, `non_comm` or `any`
+    :param download_dir: directory in which bundles are archived. Bundles are not saved if `None`
+    :param parse: return `ElementTree` (`False`) or `Article` (`True`) object
+    :param stream: clear each `<article>` element once the consumer is done with it
+    :param with_path: yield `(path, article)` tuples, as in `iter_articles`
+    :return: parsed article as `ElementTree` or `Article` object
+    """
+    baseurl, entries = _remote_listing(db, use)
+    entries = entries[:n] if n is not None else entries
+
+    for fname, size, date in entries:
+        path = os.path.join(download_dir, fname) if download_dir is not None else None
+        for article in iter_url_articles(baseurl + fname, path, parse=parse, stream=stream, with_path=with_path):
+            yield article
+        if path is not None and date is not None:
+            os.utime(path, (date, date))
+
+
+def iter_url_articles(url, tee=None, parse=True, stream=False, with_path=False):
+    """
+    Yield articles from a remote xml, gz or tar.gz file while it is being downloaded
+
+    :param url: http(s) or ftp url of the file. Its extension selects how it is decompressed
+    :param tee: optional path where the downloaded bytes are also written
+    :param parse: return `ElementTree` (`False`) or `Article` (`True`) object
+    :param stream: clear each `<article>` element once the consumer is done with it
+    :param with_path: yield `(path, article)` tuples, as in `iter_articles`
+    :return: parsed article as `ElementTree` or `Article` object
+    """
+    response = request.urlopen(url)
+    fileobj = _TeeReader(response, tee + ".part") if tee is not None else response
+
+    with fileobj:
+        for path, f in _iter_xml_sources(url, fileobj):
+            for article in _iterparse_articles(f, parse=parse, stream=stream):
+                yield (path, article) if with_path is True else article
+
+        if tee is not None:
+            fileobj.drain()
+
+    if tee is not None:
+        os.replace(tee + ".part", tee)
+
+
+class _TeeReader(object):
+    """
+    Read-only file object that copies everything read from `fileobj` to `path`
+    """
+    def __init__(self, fileobj, path):
+        self.fileobj = fileobj
+        self.out = open(path, "wb")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def read(self, size=-1):
+        data = self.fileobj.read(size)
+        self.out.write(data)
+        return data
 
+    def drain(self, block_size=1 << 16):
+        """
+        Copy whatever the parser did not need to read, e.g. archive padding
+        """
+        while self.read(block_size):
+            pass
+
+    def close(self):
+        self.out.close()
+        self.fileobj.close()
+
+
+def sync_articles(db, download_dir, use=None, manifest=None, progress=True, workers=1, retries=5, verify=False):
+    """
+    Incrementally sync a local mirror of OA article bundles
+
+    A manifest stored in `download_dir` records the remote name, size and date of
+    every bundle along with the sha256 checksum of the local copy. On each run
+    the remote listing is compared against the manifest and only bundles that
+    are new, changed remotely or missing locally are downloaded. Bundles no
+    longer listed remotely are dropped from the manifest but not deleted.
+
+    The manifest is rewritten after every completed download, so an interrupted
+    sync loses no work.
+
+    :param db: sync from `pmc` or `epmc`
+    :param download_dir: directory holding the mirror and its manifest
+    :param use: license subset to sync from pmc: `comm`, `non_comm` or `any`
+    :param manifest: path of the manifest file. Defaults to `download_dir/MANIFEST_NAME`
+    :param progress: report download progress on stdout
+    :param workers: number of parallel transfers
+    :param retries: number of times a failed transfer is retried before giving up
+    :param verify: also re-download bundles whose local checksum no longer matches the manifest
+    :return: list of paths of the bundles to parse incrementally: those downloaded by this run, and those
+        found already current locally but not yet in the manifest. Bundles whose listing changed only in
+        the precision of its date (see `_same_date`) are not reported
+    """
+    manifest = manifest if manifest is not None else os.path.join(download_dir, MANIFEST_NAME)
+    known = _read_manifest(manifest)
+
+    baseurl, entries = _remote_listing(db, use)
+    listed = {fname for fname, _, _ in entries}
+    known = {fname: record for fname, record in known.items() if fname in listed}
+
+    stale = []
+    for entry in entries:
+        path = os.path.join(download_dir, entry[0])
+        record = known.get(entry[0])
+        if record is None or not os.path.exists(path) or record["size"] != entry[1] \
+                or not _same_date(record["date"], entry[2]):
+            stale.append(entry)
+        elif verify is True and _checksum(path) != record["sha256"]:
+            # the local copy is corrupt but looks current, remove it to force the download
+            os.remove(path)
+            stale.append(entry)
+
+    changed = []
+    for (fname, size, date), path, transferred in _iter_downloads(baseurl, stale, download_dir, progress, workers,
+                                                                  retries):
+        if transferred is True or fname not in known:
+            known[fname] = {"size": size, "date": date, "sha256": _checksum(path)}
+            changed.append(path)
+        else:
+            # the local copy was already current, only its listing changed
+            known[fname].update(size=size, date=date)
+        _write_manifest(manifest, known)
+
+    _write_manifest(manifest, known)
+    return changed
+
+
+MANIFEST_NAME = ".pubmedpy-manifest.json"
+
+
+def _read_manifest(manifest):
+    if not os.path.exists(manifest):
+        return {}
+    with open(manifest) as f:
+        return json.load(f)
+
+
+def _write_manifest(manifest, records):
+    tmp = manifest + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(records, f, indent=1, sort_keys=True)
+    os.replace(tmp, manifest)
+
+
+def _checksum(path, block_size=1 << 20):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def _remote_listing(db, use):
+    """
+    :return: base url of `db` and its listing as `(filename, size, date)` tuples
+    """
     db = db.lower()
     use = use.lower() if isinstance(use, str) else use
 
@@ -83,51 +864,330 @@ def bulk_download_articles(db, n=None, use=None, download_dir=None, progress=Tru
     if db == "pmc":
         if use not in USEs:
             raise ValueError("Accepted values for use {}; got {}".format(USEs, use))
-        else:
-            _pmc_ftp_bulkdownload(n, use, download_dir, reportfunc)
+        return _pmc_ftp_listing(use)
 
-    if db == "epmc":
-        if use is not None:
-            warnings.warn("Argument 'use' has no effect when db=epmc")
-        else:
-            _epmc_ftp_bulkdownload(n, download_dir, reportfunc)
+    if use is not None:
+        warnings.warn("Argument 'use' has no effect when db=epmc")
+    return _epmc_ftp_listing()
 
 
-def _epmc_ftp_bulkdownload(n, ddir=None, reportfunc=None):
+def _epmc_ftp_listing():
     baseurl = 'https://europepmc.org/ftp/oa/'
-    lines = request.urlopen(baseurl).read().decode("utf-8").split('\n')
-    lines = [l.split()[4:] for l in lines if "xml.gz" in l]
-    size, *date, filenames = zip(*lines)
-    # size = list(map(lambda s: "{:.1f}MB".format(int(s) / 1000000), size))
-    # date = list(map(" ".join, zip(*date[:-1])))
-    filenames = list(map(lambda s: s.split('>')[0][6:-1], filenames))
-
-    for i, fname in enumerate(filenames):
-        if n is None or (n is not None and i < n):
-            link = baseurl + fname
-            fname = os.path.join(ddir, fname) if ddir is not None else fname
-            request.urlretrieve(link, fname, reportfunc)
-        else:
-            break
-        print()
+    entries = _parse_listing(request.urlopen(baseurl).read().decode("utf-8"), "xml.gz")
+    return baseurl, [(fname.split('>')[0][6:-1], size, date) for fname, size, date in entries]
 
 
-def _pmc_ftp_bulkdownload(n, use, ddir=None, reportfunc=None):
+def _pmc_ftp_listing(use):
     baseurl = 'ftp://ftp.ncbi.nlm.nih.gov/pub/pmc/oa_bulk/'
-    lines = request.urlopen(baseurl).read().decode("utf-8").split('\n')
-    lines = [l.split()[4:] for l in lines if "xml.tar.gz" in l]
-    size, *date, filenames = zip(*lines)
-    # size = list(map(lambda s: "{:.1f}MB".format(int(s) / 1000000), size))
-    # date = list(map(" ".join, zip(*date[:-1])))
-
-    for i, fname in enumerate(filenames):
-        if n is None or (n is not None and i < n):
-            if use == "any" or re.match(use, fname):
-                link = baseurl + fname
-                fname = os.path.join(ddir, fname) if ddir is not None else fname
-                request.urlretrieve(link, fname, reportfunc)
-        else:
+    entries = _parse_listing(request.urlopen(baseurl).read().decode("utf-8"), "xml.tar.gz")
+    return baseurl, [e for e in entries if use == "any" or re.match(use, e[0])]
+
+
+def _parse_listing(listing, pattern):
+    """
+    Parse the `ls -l` style directory listing served by both FTP services
+
+    :return: list of `(filename, size, date)` for every line containing `pattern`.
+        `size` is in bytes and `date` is a timestamp; either is `None` if it could
+        not be parsed
+    """
+    entries = []
+    for line in listing.split('\n'):
+        if pattern in line:
+            size, *date, fname = line.split()[4:]
+            entries.append((fname, int(size) if size.isdigit() else None, _parse_listing_date(date)))
+    return entries
+
+
+def _parse_listing_date(date):
+    date = " ".join(date)
+    for fmt in ("%b %d %Y", "%b %d %H:%M", "%Y-%m-%d %H:%M"):
+        try:
+            parsed = datetime.datetime.strptime(date, fmt)
+        except ValueError:
+            continue
+
+        if fmt == "%b %d %H:%M":
+            # recent files are listed with time instead of year
+            now = datetime.datetime.utcnow()
+            parsed = parsed.replace(year=now.year)
+            if parsed > now:
+                parsed = parsed.replace(year=now.year - 1)
+        return calendar.timegm(parsed.timetuple())
+
+
+def _same_date(a, b):
+    """
+    Compare two listing timestamps, at day precision if either only has a date
+
+    Listings show the time of recent files only (`Sep 17 10:14`), and their year
+    once they are about six months old (`Sep 17  2026`): an unchanged file has a
+    midnight timestamp from then on.
+    """
+    if a is None or b is None:
+        return a == b
+    if a % 86400 == 0 or b % 86400 == 0:
+        return a // 86400 == b // 86400
+    return a == b
+
+
+def _iter_downloads(baseurl, entries, ddir, progress, workers, retries):
+    """
+    Download listing `entries` and yield `(entry, path, transferred)` as each one completes
+    """
+    jobs = []
+    for entry in entries:
+        path = os.path.join(ddir, entry[0]) if ddir is not None else entry[0]
+        jobs.append((entry, baseurl + entry[0], path))
+
+    if workers == 1:
+        reportfunc = reporthook if progress is True else None
+        for entry, link, path in jobs:
+            transferred = _download(link, path, entry[1], entry[2], retries, reportfunc)
+            if progress is True:
+                print()
+            yield entry, path, transferred
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_download, link, path, entry[1], entry[2], retries): (entry, path)
+                   for entry, link, path in jobs}
+        for future in as_completed(futures):
+            entry, path = futures[future]
+            if progress is True:
+                print(path)
+            yield entry, path, future.result()
+
+
+def _is_current(path, size, date):
+    if size is None or not os.path.exists(path):
+        return False
+    stat = os.stat(path)
+    return stat.st_size == size and (date is None or _same_date(int(stat.st_mtime), date))
+
+
+def _download(link, path, size=None, date=None, retries=5, reportfunc=None, backoff=1.):
+    """
+    Download `link` to `path` unless it is already up to date
+
+    :return: `True` if the file was transferred, `False` if it was skipped
+    """
+    if _is_current(path, size, date):
+        return False
+
+    part = path + ".part"
+    for attempt in range(retries + 1):
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        if size is not None and offset > size:
+            offset = 0
+        if size is not None and offset == size and os.path.exists(part):
+            # a previous run got every byte but stopped before the rename
+            break
+        try:
+            if link.startswith("ftp://"):
+                _ftp_retrieve(link, part, offset, size, reportfunc)
+            else:
+                _http_retrieve(link, part, offset, reportfunc)
+            break
+        except (OSError, EOFError, ftplib.Error, http.client.HTTPException):
+            _connections.drop(link)
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+
+    os.replace(part, path)
+    if date is not None:
+        os.utime(path, (date, date))
+    return True
+
+
+class _ConnectionPool(threading.local):
+    """
+    One open connection per server and per thread, reused across transfers
+    """
+    def __init__(self):
+        self.connections = {}
+
+    def get(self, link):
+        url = urlsplit(link)
+        key = (url.scheme, url.netloc)
+        if key not in self.connections:
+            if url.scheme == "ftp":
+                conn = ftplib.FTP(url.hostname, timeout=60)
+                conn.login()
+            elif url.scheme == "https":
+                conn = http.client.HTTPSConnection(url.netloc, timeout=60)
+            else:
+                conn = http.client.HTTPConnection(url.netloc, timeout=60)
+            self.connections[key] = conn
+        return self.connections[key], url.path
+
+    def drop(self, link):
+        url = urlsplit(link)
+        conn = self.connections.pop((url.scheme, url.netloc), None)
+        if conn is not None:
+            conn.close()
+
+
+_connections = _ConnectionPool()
+
+
+def _http_retrieve(link, fname, offset=0, reportfunc=None, block_size=1 << 16, redirects=5):
+    conn, path = _connections.get(link)
+    conn.request("GET", path, headers={"Range": "bytes={}-".format(offset)} if offset else {})
+    response = conn.getresponse()
+
+    if response.status in (301, 302, 303, 307, 308):
+        response.read()
+        location = response.getheader("Location")
+        if location is None or redirects == 0:
+            raise OSError("HTTP {} without a followable redirect while downloading {}".format(response.status, link))
+        return _http_retrieve(urljoin(link, location), fname, offset, reportfunc, block_size, redirects - 1)
+    if response.status == 416 and offset:
+        response.read()
+        # `bytes */<size>`: the part file is complete if it holds every byte
+        if (response.getheader("Content-Range") or "").endswith("/{}".format(offset)):
+            return
+        # the part file does not match the remote one, start over
+        return _http_retrieve(link, fname, 0, reportfunc, block_size, redirects)
+    if response.status == 200:
+        # the server ignored the range request, start over
+        offset = 0
+    elif response.status != 206:
+        response.read()
+        raise OSError("HTTP {} while downloading {}".format(response.status, link))
+
+    length = response.getheader("Content-Length")
+    total = offset + int(length) if length is not None else -1
+    with open(fname, "ab" if offset else "wb") as out:
+        _copy(response.read, out, offset, total, reportfunc, block_size)
+
+
+def _ftp_retrieve(link, fname, offset=0, size=None, reportfunc=None, block_size=1 << 16):
+    conn, path = _connections.get(link)
+    total = size if size is not None else -1
+    with open(fname, "ab" if offset else "wb") as out:
+        written = [offset]
+
+        def callback(block):
+            out.write(block)
+            written[0] += len(block)
+            if reportfunc is not None:
+                reportfunc(written[0] // block_size, block_size, total)
+
+        if reportfunc is not None:
+            reportfunc(0, block_size, total)
+        conn.retrbinary("RETR " + path, callback, block_size, rest=offset or None)
+    if size is not None and written[0] != size:
+        raise EOFError("Transfer interrupted at {} of {} bytes".format(written[0], size))
+
+
+def _copy(read, out, offset, total, reportfunc, block_size):
+    written = offset
+    if reportfunc is not None:
+        reportfunc(0, block_size, total)
+    while True:
+        block = read(block_size)
+        if not block:
             break
+        out.write(block)
+        written += len(block)
+        if reportfunc is not None:
+            reportfunc(written // block_size, block_size, total)
+    if total != -1 and written != total:
+        raise EOFError("Transfer interrupted at {} of {} bytes".format(written, total))
+
+
+FIELDS = ("ids", "title", "authors", "affiliations", "countries", "text", "sections")
+
+
+def article_record(article, fields=("ids", "title", "authors")):
+    """
+    Plain dict of the selected fields of an article, ready to be dumped as json
+
+    - `ids`: `pmcid`, `pmid` and `doi`
+    - `title`: article title
+    - `authors`: name, email and affiliation ids of every author
+    - `affiliations`: id and institution of every affiliation
+    - `countries`: countries found in the affiliations (see `Article.get_countries`)
+    - `text`: flattened body text (see `Article.get_flat_text`)
+    - `sections`: title and text of every main section of the body
+
+    :param article: `Article` object
+    :param fields: any of `FIELDS`
+    :return: dict
+    """
+    metadata = article.front.article_meta if article.front is not None else None
+    authors = metadata.authors or [] if metadata is not None else []
+    record = {}
+
+    if "ids" in fields:
+        record["pmcid"] = metadata.pmcid if metadata is not None else None
+        record["pmid"] = metadata.pmid if metadata is not None else None
+        record["doi"] = metadata.doi if metadata is not None else None
+    if "title" in fields:
+        record["title"] = metadata.title if metadata is not None else None
+    if "authors" in fields:
+        record["authors"] = [{
+            "name": str(author.name) if author.name is not None else None,
+            "email": author.email,
+            "affiliations": [aff.aid for aff in author.affiliations or [] if aff is not None],
+        } for author in authors]
+    if "affiliations" in fields:
+        affiliations = {}
+        for author in authors:
+            for aff in author.affiliations or []:
+                if aff is not None:
+                    affiliations[id(aff)] = aff
+        record["affiliations"] = [{"id": aff.aid, "institution": ' '.join(filter(None, aff.institution or []))}
+                                  for aff in affiliations.values()]
+    if "countries" in fields:
+        record["countries"] = article.get_countries() if metadata is not None else []
+    if "text" in fields:
+        record["text"] = article.get_flat_text() or []
+    if "sections" in fields:
+        record["sections"] = [{"title": title, "text": text}
+                              for title, text in article.get_nested_text(main_sections=True) or []]
+    return record
+
+
+def write_jsonl(paths, out, fields=("ids", "title", "authors"), backend="etree", recover=False):
+    """
+    Write one json object per article of every file to `out`, flushing after each article
+
+    Every object starts with the `source` file of the article and, for archives,
+    the `member` of the archive it was read from (`None` for other files).
+
+    :param paths: paths accepted by `iter_articles`; shell-style wildcards are expanded
+    :param out: text file object, e.g. `sys.stdout`
+    :param fields: any of `FIELDS`, see `article_record`
+    :param backend: xml parser, one of `BACKENDS` (see `iter_articles`)
+    :param recover: parse malformed xml as far as possible rather than raise. Requires `backend="lxml"`
+    :return: number of articles written
+    """
+    unknown = set(fields) - set(FIELDS)
+    if unknown:
+        raise ValueError("Accepted values for fields {}; got {}".format(FIELDS, unknown))
+
+    n = 0
+    for path in _expand_paths(paths):
+        for member, article in iter_articles(path, stream=True, with_path=True, backend=backend, recover=recover):
+            record = {"source": path, "member": member if member != path else None}
+            record.update(article_record(article, fields))
+            out.write(json.dumps(record, ensure_ascii=False))
+            out.write("\n")
+            out.flush()
+            n += 1
+    return n
+
+
+def _expand_paths(paths):
+    for path in paths:
+        matches = sorted(glob.glob(path)) if glob.has_magic(path) else [path]
+        if not matches:
+            warnings.warn("{} did not match any file".format(path))
+        for match in matches:
+            yield match
 
 
 # TODO: investigate 'utf-8' codec can't decode byte 0x8b in position 1: invalid start byte
@@ -147,22 +1207,60 @@ def file_type(filename):
             return filetype
 
 
-def parse_args():
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(description='Process some integers.')
     group = parser.add_mutually_exclusive_group()
     group.add_argument('-d', '--download', choices=DBs, help='db from which to download the articles')
     parser.add_argument('-u', '--usetype', default='any', choices=USEs, help='download commercial or non-commercial articles')
-    group.add_argument('-p', '-parse', help='parse file with single or mutiple articles (also work with archives)')
+    group.add_argument('-p', '-parse', dest='parse', nargs='+', metavar='FILE',
+                       help='parse files (or glob patterns) with single or mutiple articles (also work with archives) '
+                            'and print one json object per article')
+    group.add_argument('-s', '--sync', choices=DBs, help='db with which to sync the local mirror; prints changed files')
+    parser.add_argument('-o', '--outdir', default='.', help='directory of the local mirror')
+    parser.add_argument('-w', '--workers', type=int, default=1, help='number of parallel downloads')
+    parser.add_argument('-e', '--export', help='directory where parsed articles are exported as columnar files')
+    parser.add_argument('-f', '--format', default='parquet', choices=('parquet', 'arrow'), help='format of exported files')
+    parser.add_argument('--fields', help='comma separated fields of parsed articles, among {} (default: {})'.format(
+        ','.join(FIELDS), 'ids,title,authors'))
+    parser.add_argument('--output', help='file where parsed articles are written (default: stdout)')
+    parser.add_argument('--backend', default='etree', choices=BACKENDS, help='xml parser of parsed files')
+    parser.add_argument('--recover', action='store_true', help='parse malformed xml as far as possible (lxml backend)')
 
-    return parser.parse_args()
+    args = parser.parse_args(argv)
+    if args.export and (args.fields is not None or args.output is not None):
+        parser.error("--fields and --output apply to json lines, not to the files written by --export")
+    if args.recover and args.backend != "lxml":
+        parser.error("--recover requires --backend lxml")
+    args.fields = [field.strip() for field in (args.fields or 'ids,title,authors').split(",") if field.strip()]
+    unknown = [field for field in args.fields if field not in FIELDS]
+    if unknown:
+        parser.error("unknown --fields {}; choose among {}".format(','.join(unknown), ','.join(FIELDS)))
+    return args
 
 
 if __name__ == '__main__':
     args = parse_args()
 
     if args.download:
-        bulk_download_articles(args.download, use=args.usetype)
+        use = args.usetype if args.download == "pmc" else None
+        bulk_download_articles(args.download, use=use, download_dir=args.outdir, workers=args.workers)
+    elif args.sync:
+        use = args.usetype if args.sync == "pmc" else None
+        for path in sync_articles(args.sync, args.outdir, use=use, progress=False, workers=args.workers):
+            print(path)
+    elif args.parse and args.export:
+        from export import export_files
+        export_files(list(_expand_paths(args.parse)), args.export, format=args.format, backend=args.backend,
+                     recover=args.recover)
     elif args.parse:
-        for article in iter_articles(args.parse):
-            pass
+        out = sys.stdout if args.output in (None, '-') else open(args.output, 'w', encoding='utf-8')
+        try:
+            write_jsonl(args.parse, out, args.fields, backend=args.backend, recover=args.recover)
+        except BrokenPipeError:
+            # the reading end of the pipe went away, e.g. `| head`
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            sys.exit(1)
+        finally:
+            if out is not sys.stdout:
+                out.close()
 
@@ -0,0 +1,288 @@
+"""
+Deterministic generator of synthetic JATS articles
+
+Articles are made of random but reproducible text: the same `seed` and shape
+always give the same bytes, compressed corpora included, and article `i` of a
+corpus does not depend on how many articles are generated. Their size and shape are set with keyword
+arguments (see `SHAPE`), e.g. longer articles with wide, heavily spanned tables::
+
+    write_corpus("bundle.xml.gz", 1000, seed=1, paragraphs=8, table_cols=12, span_rate=.3)
+
+Corpora are written as a single article (`.xml`, `n=1`), a multi-article bundle
+(`.xml`, `.xml.gz`) or a PMC `oa_bulk` style archive of `.nxml` files (`.tar.gz`).
+"""
+from countries import countries
+import gzip
+import io
+import os
+import random
+import tarfile
+
+# default shape of generated articles
+SHAPE = {
+    "sections": 4,          # top level <sec> of the body
+    "subsections": 2,       # <sec> nested in each section, per level
+    "depth": 2,             # levels of nested <sec>
+    "paragraphs": 3,        # <p> per section
+    "sentences": 5,         # sentences per <p>
+    "lists": 1,             # <list> per article
+    "list_items": 4,        # <list-item> per list, per level
+    "list_depth": 2,        # levels of nested <list>
+    "tables": 1,            # <table-wrap> per article
+    "table_rows": 8,        # body rows per table
+    "table_cols": 5,        # columns per table
+    "span_rate": .15,       # probability for a body cell to span several rows or columns
+    "figures": 1,           # <fig> per article
+    "authors": 6,           # <contrib contrib-type="author"> per article
+    "affiliations": 3,      # <aff> per article
+}
+
+_words = ("cell", "protein", "expression", "patients", "levels", "analysis", "model", "response", "tissue",
+          "significant", "increased", "reduced", "treatment", "control", "group", "samples", "clinical",
+          "observed", "mice", "gene", "acute", "chronic", "inflammation", "pathway", "receptor", "dose",
+          "signal", "cohort", "baseline", "function", "activity", "binding", "serum", "marker", "risk",
+          "therapy", "outcome", "survival", "mutation", "sequence", "structure", "membrane", "injury")
+_surnames = ("Smith", "Garcia", "Chen", "Müller", "Rossi", "Kowalski", "Nguyen", "Silva", "Kim", "Ahmadi",
+             "Okafor", "Haddad", "Tanaka", "Novak", "Larsen", "Dubois", "Petrov", "Singh", "Costa", "Ivanova")
+_given_names = ("Anna", "Wei", "José", "Fatima", "Lars", "Yuki", "Omar", "Maria", "Chidi", "Elena", "Ravi",
+                "Sofia", "Jan", "Amir", "Lea", "Pedro", "Hana", "Tomás", "Ingrid", "Kofi")
+_institutions = ("Department of Medicine", "Institute of Molecular Biology", "School of Public Health",
+                 "Faculty of Veterinary Medicine", "Center for Cancer Research", "Department of Genetics")
+_universities = ("University of Leiden", "National University", "Imperial College", "State University",
+                 "University Hospital", "Medical Research Council")
+_journals = (("Synth Biol Rep", "Synthetic Biology Reports"), ("J Gen Res", "Journal of Generated Research"),
+             ("Mock Med", "Mock Medicine"), ("Artif Clin Stud", "Artificial Clinical Studies"))
+_section_titles = ("Background", "Methods", "Results", "Discussion", "Conclusions", "Limitations")
+_units = ("mg", "μg/ml", "%", "mmol/l", "h", "μm")
+
+
+def generate_article(seed=0, pmcid=None, **shape):
+    """
+    Generate one JATS `<article>` document
+
+    :param seed: seed of the random generator. The same seed gives the same article
+    :param pmcid: PMCID of the article. Defaults to one derived from `seed`
+    :param shape: overrides of the defaults in `SHAPE`
+    :return: the `<article>` element as utf-8 bytes
+    """
+    unknown = set(shape) - set(SHAPE)
+    if unknown:
+        raise ValueError("Unknown shape parameters {}, accepted values {}".format(unknown, set(SHAPE)))
+    return _Generator(random.Random(seed), dict(SHAPE, **shape)).article(pmcid or str(1000000 + seed))
+
+
+def iter_generated(n, seed=0, **shape):
+    """
+    Yield `(pmcid, bytes)` for `n` generated articles
+
+    Article `i` is generated with seed `seed * 1000003 + i`, so a corpus is a
+    prefix of any larger corpus with the same seed.
+    """
+    for i in range(n):
+        pmcid = str(1000000 + seed * 1000003 + i)
+        yield pmcid, generate_article(seed * 1000003 + i, pmcid, **shape)
+
+
+def write_corpus(path, n=1, seed=0, **shape):
+    """
+    Write `n` generated articles to `path`, packaged according to its extension
+
+    - `.xml`: a single article if `n == 1`, otherwise an `<articles>` bundle
+    - `.xml.gz`, `.gz`, `.gzip`: a gzip'd `<articles>` bundle, as Europe PMC bundles
+    - `.tar.gz`, `.tgz`: one `.nxml` file per article, as PMC `oa_bulk` archives
+
+    :param path: path of the written file
+    :param n: number of articles
+    :param seed: seed of the corpus
+    :param shape: overrides of the defaults in `SHAPE`
+    :return: `path`
+    """
+    articles = iter_generated(n, seed, **shape)
+
+    if path.endswith((".tar.gz", ".tgz")):
+        with open(path, "wb") as raw, _gzip(raw) as gz, tarfile.open(fileobj=gz, mode="w") as tar:
+            for pmcid, article in articles:
+                data = b'<?xml version="1.0" encoding="UTF-8"?>\n' + article
+                info = tarfile.TarInfo("PMC{}/PMC{}.nxml".format(pmcid[:3], pmcid))
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+    elif path.endswith((".gz", ".gzip")):
+        with open(path, "wb") as raw, _gzip(raw) as f:
+            _write_bundle(f, articles)
+    elif path.endswith(".xml"):
+        with open(path, "wb") as f:
+            if n == 1:
+                f.write(b'<?xml version="1.0" encoding="UTF-8"?>\n' + next(articles)[1] + b'\n')
+            else:
+                _write_bundle(f, articles)
+    else:
+        raise ValueError("Expecting file extension xml, gz, gzip, tar.gz or tgz. Got {}".format(
+            os.path.splitext(path)[-1]))
+    return path
+
+
+def _gzip(raw):
+    # neither the file name nor a time in the header: the bytes only depend on the content
+    return gzip.GzipFile(filename="", mode="wb", fileobj=raw, mtime=0)
+
+
+def _write_bundle(f, articles):
+    f.write(b'<?xml version="1.0" encoding="UTF-8"?>\n<articles>\n')
+    for _, article in articles:
+        f.write(article)
+        f.write(b'\n')
+    f.write(b'</articles>\n')
+
+
+class _Generator(object):
+    """
+    Builds the markup of one article, drawing every choice from `rng`
+    """
+    def __init__(self, rng, shape):
+        self.rng = rng
+        self.shape = shape
+        self.out = []
+
+    def article(self, pmcid):
+        self.out.append('<article xmlns:xlink="http://www.w3.org/1999/xlink" article-type="{}">'.format(
+            self.rng.choice(("research-article", "research-article", "review-article", "case-report"))))
+        self.front(pmcid)
+        self.body()
+        self.out.append('<back><ref-list><ref id="B1"><mixed-citation>{}</mixed-citation></ref></ref-list></back>'
+                        .format(self.sentence()))
+        self.out.append('</article>')
+        return ''.join(self.out).encode("utf-8")
+
+    def sentence(self, words=12):
+        text = ' '.join(self.rng.choice(_words) for _ in range(self.rng.randint(words // 2, words)))
+        return text[0].upper() + text[1:] + '.'
+
+    def front(self, pmcid):
+        rng, shape, out = self.rng, self.shape, self.out
+        jid, jtitle = rng.choice(_journals)
+        year = rng.randint(2000, 2020)
+
+        out.append('<front><journal-meta><journal-id journal-id-type="nlm-ta">{}</journal-id>'
+                   '<journal-title-group><journal-title>{}</journal-title></journal-title-group>'
+                   '</journal-meta>'.format(jid, jtitle))
+        out.append('<article-meta><article-id pub-id-type="pmid">{}</article-id>'
+                   '<article-id pub-id-type="pmcid">{}</article-id>'
+                   '<article-id pub-id-type="doi">10.5555/synth.{}</article-id>'.format(
+                       rng.randint(10000000, 39999999), pmcid, pmcid))
+        out.append('<title-group><article-title>{}</article-title></title-group>'.format(self.sentence()[:-1]))
+
+        out.append('<contrib-group>')
+        n_affs = shape["affiliations"]
+        for _ in range(shape["authors"]):
+            out.append('<contrib contrib-type="author"><name><surname>{}</surname>'
+                       '<given-names>{}</given-names></name>'.format(rng.choice(_surnames), rng.choice(_given_names)))
+            if n_affs:
+                for aff in sorted(rng.sample(range(1, n_affs + 1), rng.randint(1, min(2, n_affs)))):
+                    out.append('<xref ref-type="aff" rid="Aff{0}">{0}</xref>'.format(aff))
+            if rng.random() < .3:
+                out.append('<address><email>author{}@example.org</email></address>'.format(rng.randint(1, 999)))
+            out.append('</contrib>')
+        for aff in range(1, n_affs + 1):
+            out.append('<aff id="Aff{0}"><label>{0}</label><institution-wrap><institution>{1}, </institution>'
+                       '<institution>{2}, </institution></institution-wrap>{3} </aff>'.format(
+                           aff, rng.choice(_institutions), rng.choice(_universities), rng.choice(countries)))
+        out.append('</contrib-group>')
+
+        out.append('<pub-date pub-type="epub"><day>{}</day><month>{}</month><year>{}</year></pub-date>'.format(
+            rng.randint(1, 28), rng.randint(1, 12), year))
+        out.append('<abstract><p>{}</p></abstract></article-meta></front>'.format(self.sentence(30)))
+
+    def body(self):
+        shape = self.shape
+        sections = max(shape["sections"], 1)
+        # spread lists, tables and figures over the top level sections
+        floats = [[] for _ in range(sections)]
+        for kind in ("lists", "tables", "figures"):
+            for i in range(shape[kind]):
+                floats[self.rng.randrange(sections)].append((kind, i + 1))
+
+        self.out.append('<body>')
+        for i in range(sections):
+            self.section(_section_titles[i % len(_section_titles)], shape["depth"], floats[i])
+        self.out.append('</body>')
+
+    def section(self, title, depth, floats=()):
+        shape, out = self.shape, self.out
+        out.append('<sec><title>{}</title>'.format(title))
+        for _ in range(shape["paragraphs"]):
+            self.paragraph()
+        for kind, i in floats:
+            if kind == "lists":
+                self.list(shape["list_depth"])
+            elif kind == "tables":
+                self.table(i)
+            else:
+                self.figure(i)
+        if depth > 0:
+            for _ in range(shape["subsections"]):
+                self.section(self.sentence(4)[:-1], depth - 1)
+        out.append('</sec>')
+
+    def paragraph(self):
+        rng, out = self.rng, self.out
+        out.append('<p>')
+        for _ in range(self.shape["sentences"]):
+            roll = rng.random()
+            if roll < .1:
+                out.append('<italic>{}</italic> '.format(rng.choice(_words)))
+            elif roll < .25:
+                out.append('{} [<xref ref-type="bibr" rid="B1">{}</xref>] '.format(
+                    self.sentence()[:-1], rng.randint(1, 60)))
+                continue
+            out.append(self.sentence() + ' ')
+        out.append('</p>')
+
+    def list(self, depth):
+        out = self.out
+        out.append('<list list-type="bullet">')
+        for _ in range(self.shape["list_items"]):
+            out.append('<list-item><p>{}</p>'.format(self.sentence(8)))
+            if depth > 1 and self.rng.random() < .5:
+                self.list(depth - 1)
+            out.append('</list-item>')
+        out.append('</list>')
+
+    def table(self, i):
+        rng, shape, out = self.rng, self.shape, self.out
+        rows, cols = max(shape["table_rows"], 1), max(shape["table_cols"], 1)
+
+        out.append('<table-wrap id="Tab{0}"><label>Table {0}</label><caption><p>{1}</p></caption>'
+                   '<table frame="hsides" rules="groups"><thead><tr>'.format(i, self.sentence(8)))
+        for col in range(cols):
+            out.append('<th>{}</th>'.format(rng.choice(_words).capitalize() if col else "Group"))
+        out.append('</tr></thead><tbody>')
+
+        # cells covered by a rowspan or colspan of an earlier cell
+        covered = set()
+        for row in range(rows):
+            out.append('<tr>')
+            for col in range(cols):
+                if (row, col) in covered:
+                    continue
+                rowspan = colspan = 1
+                if rng.random() < shape["span_rate"]:
+                    rowspan = rng.randint(1, min(3, rows - row))
+                    while colspan < 3 and col + colspan < cols and (row, col + colspan) not in covered \
+                            and rng.random() < .5:
+                        colspan += 1
+                for r in range(row, row + rowspan):
+                    for c in range(col, col + colspan):
+                        covered.add((r, c))
+
+                attrs = ''.join((' rowspan="{}"'.format(rowspan) if rowspan > 1 else '',
+                                 ' colspan="{}"'.format(colspan) if colspan > 1 else ''))
+                cell = rng.choice(_words) if col == 0 else "{:.2f} ± {:.2f} {}".format(
+                    rng.uniform(0, 500), rng.uniform(0, 50), rng.choice(_units))
+                out.append('<td{}>{}</td>'.format(attrs, cell))
+            out.append('</tr>')
+        out.append('</tbody></table><table-wrap-foot><p>{}</p></table-wrap-foot></table-wrap>'.format(
+            self.sentence(10)))
+
+    def figure(self, i):
+        self.out.append('<fig id="Fig{0}"><label>Fig. {0}</label><caption><title>{1}</title><p>{2}</p></caption>'
+                        '<graphic xlink:href="fig{0}.jpg"/></fig>'.format(i, self.sentence(6), self.sentence(20)))
@@ -0,0 +1,133 @@
+import re
+import xml.etree.ElementTree as et
+
+import pytest
+
+from article import Article, Body, Paragraph, Table
+from pubmedpy import iter_articles, iter_metadata
+import synthetic
+
+
+def _table(xml):
+    return Table(et.fromstring(xml))
+
+
+def test_to_dataframe():
+    pd = pytest.importorskip("pandas")
+    table = _table('<table><thead><tr><th>name</th><th>n</th></tr></thead>'
+                   '<tbody><tr><td>a</td><td>1</td></tr><tr><td>b</td><td></td></tr></tbody></table>')
+
+    frame = table.to_dataframe()
+
+    assert list(frame.columns) == ["name", "n"]
+    assert list(frame["name"]) == ["a", "b"]
+    assert frame["n"].dtype == "float64" and frame["n"][0] == 1 and pd.isna(frame["n"][1])
+
+
+@pytest.mark.parametrize("xml", ['<table><thead><tr><th>a</th><th>b</th></tr></thead></table>',
+                                 '<table><tr><th>a</th><th>b</th></tr></table>'])
+def test_to_dataframe_header_only(xml):
+    pytest.importorskip("pandas")
+    frame = _table(xml).to_dataframe()
+
+    assert list(frame.columns) == ["a", "b"]
+    assert frame.shape == (0, 2)
+
+
+
+@pytest.mark.parametrize("backend", ["etree", "lxml"])
+def test_journal_title(tmp_path, backend):
+    if backend == "lxml":
+        pytest.importorskip("lxml")
+    path = synthetic.write_corpus(str(tmp_path / "bundle.xml"), 3, seed=5)
+    titles = {title for _, title in synthetic._journals}
+
+    articles = list(iter_articles(path, backend=backend))
+    assert all(a.front.journal_meta.title in titles for a in articles)
+    assert [f.journal_meta.title for f in iter_metadata(path)] == [a.front.journal_meta.title for a in articles]
+
+
+def _article(**kwargs):
+    return Article(et.fromstring(synthetic.generate_article(1)), **kwargs)
+
+
+@pytest.mark.parametrize("sections, titles", [
+    ("Methods", ["Methods"]),
+    (["Methods", re.compile("^Res")], ["Methods", "Results"]),
+    (re.compile("s$"), ["Methods", "Results"]),
+    ("Methods and more", []),
+    ("Method", []),
+])
+def test_parse_sections(sections, titles):
+    article = _article(sections=sections)
+    assert article.get_body_structure(main_sections=True) == titles
+    full = _article()
+    assert article.get_flat_text() == full.get_flat_text(sections=sections)
+    assert [title for title, _ in full.get_nested_text(main_sections=True, sections=sections)] == titles
+
+
+def test_view_sections():
+    article = _article()
+    methods = article.get_flat_text(sections=["Methods"])
+    assert methods and methods == _article(sections="Methods").get_flat_text()
+    # a bare string is one exact title, not a collection of substrings
+    assert article.get_flat_text(sections="Methods and more") == []
+    assert article.get_flat_text(sections=re.compile("^Meth")) == methods
+
+    # views used to cache their first result whatever the sections asked for
+    everything = article.get_flat_text()
+    assert len(everything) > len(methods)
+    assert article.get_flat_text(sections=["Results"]) not in (methods, everything)
+
+
+def test_views_memoized():
+    article = _article()
+    assert article.get_flat_content() is article.get_flat_content()
+    methods = article.get_flat_content(sections="Methods")
+    assert article.get_flat_content(sections=["Methods"]) is methods
+    assert article.get_flat_content(sections=("Methods",)) is methods
+    assert article.get_nested_text(main_sections=True) is article.get_nested_text(main_sections=True)
+    assert article.get_nested_text(main_sections=True) is not article.get_nested_text()
+    assert article.todict() is article.todict()
+
+    # a new body drops every view of the previous one
+    article.body = Body()
+    assert article.get_flat_content() == [] and article.get_flat_content(sections="Methods") == []
+    assert article.todict() == {}
+
+
+def _numbered(node):
+    """
+    Titles of the paragraphs and tables under `node`, in document order
+    """
+    titles = []
+    for child in node._children():
+        if child is None:
+            continue
+        if isinstance(child, (Paragraph, Table)):
+            titles.append(child.title)
+        if hasattr(child, "_children"):
+            titles.extend(_numbered(child))
+    return titles
+
+
+def test_numbering_per_article():
+    from concurrent.futures import ThreadPoolExecutor
+
+    chunks = [synthetic.generate_article(seed, tables=3, paragraphs=4) for seed in range(24)]
+
+    def numbering(chunk):
+        article = Article(et.fromstring(chunk))
+        return list(article.todict()), _numbered(article.body)
+
+    sequential = [numbering(chunk) for chunk in chunks]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        threaded = list(executor.map(numbering, chunks * 4))
+    assert threaded == sequential * 4
+
+    # numbering restarts with every article
+    for keys, titles in sequential[:2]:
+        assert [key for key in keys if key.startswith("Table")][:3] == ["Table1", "Table2", "Table3"]
+        paragraphs = [title for title in titles if title.startswith("Paragraph")]
+        assert sorted(paragraphs, key=lambda t: int(t[len("Paragraph"):])) == \
+            ["Paragraph{}".format(n) for n in range(1, len(paragraphs) + 1)]
@@ -0,0 +1,111 @@
+import os
+
+import pytest
+
+import cache
+from cache import ArticleCache
+from pubmedpy import iter_articles
+import synthetic
+
+
+@pytest.fixture
+def parsed(monkeypatch):
+    """
+    Paths of the files the cache parses, in order
+    """
+    paths = []
+    parse = cache.iter_articles
+    monkeypatch.setattr(cache, "iter_articles", lambda path, **kwargs: paths.append(path) or parse(path, **kwargs))
+    return paths
+
+
+@pytest.mark.parametrize("name", ["bundle.xml", "bundle.xml.gz", "archive.tar.gz"])
+def test_round_trip(tmp_path, parsed, name):
+    path = synthetic.write_corpus(str(tmp_path / name), 8, seed=7)
+    articles = [(p, a.to_bytes()) for p, a in iter_articles(path, with_path=True)]
+    pmcids = [pmcid for pmcid, _ in synthetic.iter_generated(8, seed=7)]
+
+    with_cache = ArticleCache(str(tmp_path / "cache.sqlite"))
+    assert [(p, a.to_bytes()) for p, a in with_cache.iter_articles(path, with_path=True)] == articles
+    assert [(p, a.to_bytes()) for p, a in with_cache.iter_articles(path, with_path=True)] == articles
+    assert with_cache.parse_article(path).to_bytes() == articles[0][1]
+    assert with_cache.parse_article(path, pmcid=pmcids[-1]).to_bytes() == articles[-1][1]
+    assert with_cache.parse_article(path, pmcid="1") is None
+    assert parsed == [path]
+    assert with_cache.size() > 0
+    with_cache.close()
+
+    # persisted across instances
+    with_cache = ArticleCache(str(tmp_path / "cache.sqlite"))
+    assert [a.to_bytes() for a in with_cache.iter_articles(path)] == [a for _, a in articles]
+    assert parsed == [path]
+    with_cache.close()
+
+
+@pytest.mark.parametrize("pmcid", ["{}", "PMC{}", "pmc{}", " PMC{} "])
+def test_parse_article_pmcid(tmp_path, parsed, pmcid):
+    path = synthetic.write_corpus(str(tmp_path / "bundle.xml"), 3, seed=1)
+    expected = [a.to_bytes() for a in iter_articles(path)]
+    with_cache = ArticleCache(str(tmp_path / "cache.sqlite"))
+    for number, data in zip((pmcid for pmcid, _ in synthetic.iter_generated(3, seed=1)), expected):
+        assert with_cache.parse_article(path, pmcid=pmcid.format(number)).to_bytes() == data
+    assert parsed == [path]
+    with_cache.close()
+
+
+def test_modified_file(tmp_path, parsed):
+    path = str(tmp_path / "bundle.xml")
+    synthetic.write_corpus(path, 3, seed=1)
+    with_cache = ArticleCache(str(tmp_path / "cache.sqlite"))
+    for _ in with_cache.iter_articles(path):
+        pass
+
+    synthetic.write_corpus(path, 4, seed=2)
+    os.utime(path, (os.path.getmtime(path) + 10,) * 2)
+    assert [a.to_bytes() for a in with_cache.iter_articles(path)] == [a.to_bytes() for a in iter_articles(path)]
+    assert with_cache.parse_article(path, pmcid=next(synthetic.iter_generated(1, seed=1))[0]) is None
+    assert parsed == [path, path]
+
+    # a file left half read is parsed again
+    synthetic.write_corpus(path, 4, seed=3)
+    os.utime(path, (os.path.getmtime(path) + 20,) * 2)
+    next(with_cache.iter_articles(path))
+    assert len(list(with_cache.iter_articles(path))) == 4
+    assert parsed == [path] * 4
+    with_cache.close()
+
+
+def test_lru_eviction(tmp_path, parsed):
+    paths = [synthetic.write_corpus(str(tmp_path / "bundle{}.xml".format(i)), 3, seed=i) for i in range(4)]
+    sizes = []
+    with_cache = ArticleCache(str(tmp_path / "sizes.sqlite"))
+    for path in paths:
+        before = with_cache.size()
+        for _ in with_cache.iter_articles(path):
+            pass
+        sizes.append(with_cache.size() - before)
+    with_cache.close()
+    del parsed[:]
+
+    # room for the two largest files, not for three
+    with_cache = ArticleCache(str(tmp_path / "cache.sqlite"), max_size=sum(sorted(sizes)[-2:]))
+    for path in paths[:2]:
+        for _ in with_cache.iter_articles(path):
+            pass
+    # reading the first file again makes the second one the least recently used
+    for _ in with_cache.iter_articles(paths[0]):
+        pass
+    for _ in with_cache.iter_articles(paths[2]):
+        pass
+    assert with_cache.size() <= with_cache.max_size
+
+    cached = {row[0] for row in with_cache.db.execute("SELECT source FROM files")}
+    assert cached == {os.path.abspath(paths[0]), os.path.abspath(paths[2])}
+    assert parsed == [paths[0], paths[1], paths[2]]
+    for _ in with_cache.iter_articles(paths[1]):
+        pass
+    assert parsed[-1] == paths[1]
+
+    with_cache.invalidate()
+    assert with_cache.size() == 0
+    with_cache.close()
@@ -0,0 +1,67 @@
+import xml.etree.ElementTree as et
+
+import pytest
+
+from article import Article, geotag_articles
+from countries import aliases, canonical, countries, find_country, geotag
+import synthetic
+
+
+@pytest.mark.parametrize("text, country", [
+    # aliases
+    ("Harvard Medical School, Boston, MA, USA", "United States"),
+    ("Dept. of Biology, U.S.A.", "United States"),
+    ("University of Oxford, Oxford, England", "United Kingdom"),
+    ("Peking University, Beijing, P.R. China", "China"),
+    ("Kigali, RWANDA", "Rwanda"),
+    ("Abidjan, Côte d'Ivoire", "Cote D'Ivoire"),
+    # whole words only
+    ("Indiana University, Bloomington", None),
+    ("Chadwick Hospital", None),
+    ("Nigerian Institute of Medical Research, Lagos", None),
+    # the longest name wins
+    ("United States Minor Outlying Islands", "United States Minor Outlying Islands"),
+    ("Bissau, Guinea-Bissau", "Guinea-Bissau"),
+    ("Port Moresby, Papua New Guinea", "Papua New Guinea"),
+    ("Santo Domingo, Dominican Republic", "Dominican Republic"),
+    # the last name wins
+    ("Rutgers University, New Jersey, USA", "United States"),
+    ("Jersey General Hospital, St Helier, Jersey", "Jersey"),
+    ("France-Germany joint lab, Berlin, Germany", "Germany"),
+    ("", None),
+])
+def test_find_country(text, country):
+    assert find_country(text) == country
+
+
+def test_canonical_names():
+    # every alias resolves to a name of `countries`
+    assert set(aliases.values()) <= set(countries)
+    assert set(canonical.values()) <= set(countries)
+    assert geotag(["Paris, France", "Lyon", "Paris, France"]) == ["France", None, "France"]
+
+
+AFFILIATIONS = b"""<article><front><article-meta><title-group><article-title>T</article-title></title-group>
+<contrib-group><contrib contrib-type="author"><name><surname>S</surname></name>
+<xref ref-type="aff" rid="a1"/><xref ref-type="aff" rid="a2"/><xref ref-type="aff" rid="a3"/></contrib>
+<aff id="a1"><institution-wrap><institution>Rutgers University</institution></institution-wrap>, New Jersey, USA</aff>
+<aff id="a2"><institution-wrap><institution>University of Oxford</institution></institution-wrap>, Oxford, England</aff>
+<aff id="a3"><institution-wrap><institution>Institut Pasteur</institution></institution-wrap></aff>
+</contrib-group></article-meta></front></article>"""
+
+
+def test_get_countries():
+    article = Article(et.fromstring(AFFILIATIONS))
+    assert article.get_countries() == ["United States", "United Kingdom"]
+
+
+def test_geotag_articles():
+    chunks = [synthetic.generate_article(seed) for seed in range(10)] + [AFFILIATIONS]
+    articles = [Article(et.fromstring(chunk)) for chunk in chunks]
+
+    tagged = geotag_articles(articles)
+    expected = [Article(et.fromstring(chunk)).get_countries() for chunk in chunks]
+    assert tagged == expected
+    assert tagged[-1] == ["United States", "United Kingdom"]
+    assert any(tagged[:-1])
+    assert [article.get_countries() for article in articles] == tagged
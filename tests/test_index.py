@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+import blockgzip
+from index import ArticleIndex, build_index, get_article
+from pubmedpy import iter_articles
+import synthetic
+
+
+@pytest.mark.parametrize("name", ["bundle.xml", "bundle.xml.gz"])
+def test_build_index(tmp_path, name):
+    path = synthetic.write_corpus(str(tmp_path / name), 12, seed=7)
+    articles = [a.to_bytes() for a in iter_articles(path)]
+    pmcids = [pmcid for pmcid, _ in synthetic.iter_generated(12, seed=7)]
+
+    with build_index(path) as index:
+        assert len(index) == 12
+        data_file = index.data_file
+        for pmcid, data in zip(pmcids, articles):
+            assert index.get_article(pmcid=pmcid).to_bytes() == data
+        meta = index.get_article(pmcid=pmcids[5]).front.article_meta
+        assert index.get_article(doi=meta.doi).to_bytes() == articles[5]
+        assert index.get_article(pmcid="1") is None
+        assert index.get_article(pmcid=pmcids[0], parse=False).tag == "article"
+        with pytest.raises(ValueError):
+            index.get_article()
+
+    if name.endswith(".gz"):
+        # rewritten as blocked gzip, which is still a bundle of the same articles
+        assert data_file == os.path.abspath(str(tmp_path / "bundle.blocked.xml.gz"))
+        assert blockgzip.is_blocked(data_file)
+        assert [a.to_bytes() for a in iter_articles(data_file)] == articles
+        # indexed in place from now on
+        with build_index(data_file, str(tmp_path / "again.idx")) as index:
+            assert index.data_file == data_file and len(index) == 12
+    else:
+        assert data_file == os.path.abspath(path)
+    assert get_article(data_file, pmcid=pmcids[-1]).to_bytes() == articles[-1]
+
+
+def test_index_outdated(tmp_path):
+    path = synthetic.write_corpus(str(tmp_path / "bundle.xml"), 3, seed=1)
+    build_index(path).close()
+    os.utime(path, (0, 0))
+    with pytest.raises(ValueError):
+        ArticleIndex(path + ".idx")
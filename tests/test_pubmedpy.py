@@ -0,0 +1,429 @@
+import calendar
+import gzip
+import os
+import pathlib
+
+import pytest
+
+from article import ParseStats
+from pubmedpy import iter_articles, iter_url_articles
+import synthetic
+
+
+def _url(path):
+    return pathlib.Path(path).resolve().as_uri()
+
+
+def test_tee_plain_xml_url(tmp_path):
+    path = synthetic.write_corpus(str(tmp_path / "bundle.xml"), 5, seed=1)
+    tee = str(tmp_path / "copy.xml")
+
+    articles = [a.to_bytes() for a in iter_url_articles(_url(path), tee=tee)]
+
+    assert articles == [a.to_bytes() for a in iter_articles(path)]
+    assert open(tee, "rb").read() == open(path, "rb").read()
+    assert not os.path.exists(tee + ".part")
+
+
+def test_tee_gzip_url(tmp_path):
+    path = synthetic.write_corpus(str(tmp_path / "bundle.xml.gz"), 5, seed=1)
+    tee = str(tmp_path / "copy.xml.gz")
+
+    assert len(list(iter_url_articles(_url(path), tee=tee))) == 5
+    assert gzip.open(tee).read() == gzip.open(path).read()
+
+
+class _Server(object):
+    """
+    Local http server of one payload at `/data.xml`, with range requests and redirects to it
+
+    Other payloads are served by adding their path to `files`.
+    """
+    def __init__(self, payload):
+        import http.server
+        import threading
+
+        server = self
+        self.files = {"/data.xml": payload}
+        self.requests = []
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append((self.path, self.headers.get("Range")))
+                if self.path.startswith("/redirect/"):
+                    hops = int(self.path.rsplit("/", 1)[-1])
+                    self.send_response(302)
+                    self.send_header("Location", "/redirect/{}".format(hops - 1) if hops > 1 else "/data.xml")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                payload = server.files.get(self.path)
+                if payload is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                start = int(self.headers["Range"][len("bytes="):-1]) if self.headers.get("Range") else 0
+                if start >= len(payload):
+                    self.send_response(416)
+                    self.send_header("Content-Range", "bytes */{}".format(len(payload)))
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(206 if start else 200)
+                self.send_header("Content-Length", str(len(payload) - start))
+                self.end_headers()
+                self.wfile.write(payload[start:])
+
+            def log_message(self, *args):
+                pass
+
+        Handler.protocol_version = "HTTP/1.1"
+        self.httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = "http://127.0.0.1:{}".format(self.httpd.server_port)
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def test_download_complete_part(tmp_path):
+    from pubmedpy import _connections, _download
+
+    payload = synthetic.generate_article(1)
+    server = _Server(payload)
+    try:
+        path = str(tmp_path / "data.xml")
+        with open(path + ".part", "wb") as f:
+            f.write(payload)
+        assert _download(server.url + "/data.xml", path, size=len(payload), retries=0) is True
+        assert open(path, "rb").read() == payload
+        assert server.requests == []
+
+        # size unknown: the server answers 416 to a range request past the end
+        with open(path + ".part", "wb") as f:
+            f.write(payload)
+        _download(server.url + "/data.xml", path, retries=0)
+        assert open(path, "rb").read() == payload
+
+        # resumed download
+        os.remove(path)
+        with open(path + ".part", "wb") as f:
+            f.write(payload[:100])
+        _download(server.url + "/data.xml", path, size=len(payload), retries=0)
+        assert open(path, "rb").read() == payload
+        assert server.requests[-1] == ("/data.xml", "bytes=100-")
+    finally:
+        _connections.drop(server.url)
+        server.close()
+
+
+def test_download_follows_redirects(tmp_path):
+    from pubmedpy import _connections, _download
+
+    payload = synthetic.generate_article(2)
+    server = _Server(payload)
+    try:
+        path = str(tmp_path / "data.xml")
+        _download(server.url + "/redirect/3", path, retries=0)
+        assert open(path, "rb").read() == payload
+
+        with pytest.raises(OSError):
+            _download(server.url + "/redirect/9", str(tmp_path / "other.xml"), retries=0)
+    finally:
+        _connections.drop(server.url)
+        server.close()
+
+
+def _listing_line(fname, size, date):
+    return "-rw-r--r--   1 ftp      anonymous {:>10} {} {}".format(size, date, fname)
+
+
+def test_parse_listing():
+    import datetime
+    from pubmedpy import _parse_listing, _same_date
+
+    recent = datetime.datetime.utcnow().replace(second=0, microsecond=0) - datetime.timedelta(days=10)
+    listing = "\n".join([
+        _listing_line("a.xml.gz", 1024, recent.strftime("%b %d %H:%M")),
+        _listing_line("a.xml.gz", 1024, recent.strftime("%b %d  %Y")),
+        _listing_line("b.xml.gz", "-", "2020-01-31 12:30"),
+        _listing_line("README.txt", 10, "Jan 01  2020"),
+    ])
+    (_, size, timed), (_, _, dated), entry = _parse_listing(listing, "xml.gz")
+
+    assert size == 1024 and timed == calendar.timegm(recent.timetuple())
+    assert dated == calendar.timegm(recent.date().timetuple())
+    assert entry == ("b.xml.gz", None, calendar.timegm((2020, 1, 31, 12, 30, 0)))
+    # the same file, listed with its time and later with its year
+    assert _same_date(timed, dated) and _same_date(dated, timed)
+    assert not _same_date(timed, timed + 60)
+    assert not _same_date(dated, dated + 86400)
+    assert _same_date(None, None) and not _same_date(None, dated)
+
+
+def test_download_skips_current(tmp_path):
+    from pubmedpy import _download
+
+    path = str(tmp_path / "data.xml.gz")
+    with open(path, "wb") as f:
+        f.write(b"x" * 100)
+    timed = calendar.timegm((2026, 9, 17, 10, 14, 0))
+    os.utime(path, (timed, timed))
+
+    # nothing listens on the link: any transfer attempt would fail
+    link = "http://127.0.0.1:9/data.xml.gz"
+    assert _download(link, path, 100, timed, retries=0) is False
+    assert _download(link, path, 100, calendar.timegm((2026, 9, 17, 0, 0, 0)), retries=0) is False
+    with pytest.raises(OSError):
+        _download(link, path, 100, calendar.timegm((2026, 9, 18, 0, 0, 0)), retries=0, backoff=0)
+    with pytest.raises(OSError):
+        _download(link, path, 101, timed, retries=0, backoff=0)
+
+
+def test_ftp_short_transfer(tmp_path):
+    from pubmedpy import _connections, _download
+
+    class FTP(object):
+        def retrbinary(self, cmd, callback, block_size, rest=None):
+            callback(b"x" * 60)
+
+        def close(self):
+            pass
+
+    link = "ftp://ftp.example.org/data.xml.gz"
+    path = str(tmp_path / "data.xml.gz")
+    _connections.connections[("ftp", "ftp.example.org")] = FTP()
+    try:
+        with pytest.raises(EOFError):
+            _download(link, path, 100, retries=0)
+    finally:
+        _connections.drop(link)
+    assert not os.path.exists(path)
+    assert os.path.getsize(path + ".part") == 60
+
+
+def test_sync_articles(tmp_path, monkeypatch):
+    import json
+    import pubmedpy
+
+    payloads = {name: synthetic.generate_article(seed) for seed, name in enumerate(("a.xml.gz", "b.xml.gz"))}
+    server = _Server(b"")
+    server.files.update(("/" + name, data) for name, data in payloads.items())
+    timed = calendar.timegm((2026, 9, 17, 10, 14, 0))
+    dated = calendar.timegm((2026, 9, 17, 0, 0, 0))
+    listing = {name: (len(data), timed) for name, data in payloads.items()}
+    monkeypatch.setattr(pubmedpy, "_remote_listing", lambda db, use: (
+        server.url + "/", [(name, size, date) for name, (size, date) in sorted(listing.items())]))
+
+    def sync():
+        n = len(server.requests)
+        changed = pubmedpy.sync_articles("epmc", str(tmp_path), progress=False)
+        return sorted(os.path.basename(path) for path in changed), len(server.requests) - n
+
+    try:
+        assert sync() == (["a.xml.gz", "b.xml.gz"], 2)
+        assert sync() == ([], 0)
+
+        # the listing only shows the date of the same files now
+        listing = {name: (size, dated) for name, (size, _) in listing.items()}
+        assert sync() == ([], 0)
+
+        payloads["b.xml.gz"] = server.files["/b.xml.gz"] = synthetic.generate_article(5)
+        listing["b.xml.gz"] = (len(payloads["b.xml.gz"]), timed + 86400)
+        assert sync() == (["b.xml.gz"], 1)
+
+        # already downloaded, e.g. by `bulk_download_articles`, but new to the manifest
+        payloads["c.xml.gz"] = server.files["/c.xml.gz"] = synthetic.generate_article(6)
+        listing["c.xml.gz"] = (len(payloads["c.xml.gz"]), timed)
+        with open(str(tmp_path / "c.xml.gz"), "wb") as f:
+            f.write(payloads["c.xml.gz"])
+        os.utime(str(tmp_path / "c.xml.gz"), (timed, timed))
+        assert sync() == (["c.xml.gz"], 0)
+
+        for name, data in payloads.items():
+            assert (tmp_path / name).read_bytes() == data
+        with open(str(tmp_path / pubmedpy.MANIFEST_NAME)) as f:
+            assert sorted(json.load(f)) == ["a.xml.gz", "b.xml.gz", "c.xml.gz"]
+    finally:
+        pubmedpy._connections.drop(server.url)
+        server.close()
+
+
+@pytest.mark.parametrize("backend", ["etree", "lxml"])
+def test_where_stats(tmp_path, backend):
+    if backend == "lxml":
+        pytest.importorskip("lxml")
+    path = synthetic.write_corpus(str(tmp_path / "bundle.xml"), 60, seed=4)
+    everything, selected = ParseStats(), ParseStats()
+
+    n = len(list(iter_articles(path, backend=backend, stats=everything)))
+    kept = list(iter_articles(path, backend=backend, stats=selected, where={"type": "case-report"}))
+
+    assert 0 < len(kept) < n / 2
+    assert all(a.type == "case-report" for a in kept)
+    assert selected.articles == len(kept) and everything.articles == n
+    # rejected articles are charged to nobody
+    assert selected.nbytes < everything.nbytes * .6
+    assert selected.times["tokenize"] < everything.times["tokenize"]
+
+
+def test_stats_nbytes(tmp_path):
+    path = synthetic.write_corpus(str(tmp_path / "bundle.xml"), 30, seed=8)
+    records = []
+    stats = ParseStats(callback=lambda article, record: records.append(record))
+    for _ in iter_articles(path, stats=stats):
+        pass
+
+    assert len(records) == stats.articles == 30
+    assert all(record.nbytes == 0 and record.tags["article"] == 1 for record in records)
+    assert stats.nbytes == os.path.getsize(path)
+
+
+def test_parse_article_member(tmp_path, monkeypatch):
+    import pubmedpy
+
+    path = synthetic.write_corpus(str(tmp_path / "archive.tar.gz"), 5, seed=6)
+    members = [(p, a.to_bytes()) for p, a in iter_articles(path, with_path=True)]
+    parsed = []
+    iterparse = pubmedpy._iterparse_articles
+    monkeypatch.setattr(pubmedpy, "_iterparse_articles", lambda f, **kwargs: parsed.append(f) or iterparse(f, **kwargs))
+
+    assert pubmedpy.parse_article(path, member=members[3][0]).to_bytes() == members[3][1]
+    assert len(parsed) == 1
+    assert pubmedpy.parse_article(path).to_bytes() == members[0][1]
+    assert pubmedpy.parse_article(path, member="missing.nxml") is None
+    assert len(parsed) == 2
+
+
+@pytest.mark.parametrize("argv, message", [
+    (["-p", "a.xml", "--fields", "ids,titel,doi"], "unknown --fields titel,doi"),
+    (["-p", "a.xml", "-e", "out", "--fields", "ids"], "--fields and --output"),
+    (["-p", "a.xml", "-e", "out", "--output", "a.jsonl"], "--fields and --output"),
+    (["-p", "a.xml", "--recover"], "--recover requires --backend lxml"),
+])
+def test_parse_args_errors(capsys, argv, message):
+    from pubmedpy import parse_args
+
+    with pytest.raises(SystemExit):
+        parse_args(argv)
+    assert message in capsys.readouterr().err
+
+
+def test_parse_args():
+    from pubmedpy import parse_args
+
+    assert parse_args(["-p", "a.xml"]).fields == ["ids", "title", "authors"]
+    assert parse_args(["-p", "a.xml", "--fields", "ids, text,"]).fields == ["ids", "text"]
+    args = parse_args(["-p", "a.xml", "-e", "out", "--backend", "lxml", "--recover"])
+    assert (args.export, args.backend, args.recover) == ("out", "lxml", True)
+
+
+COMPRESSED = ["bundle.xml.gz", "bundle.xml.gzip", "bundle.xml.bz2", "bundle.xml.zst", "bundle.blocked.xml.gz",
+              "archive.tar", "archive.tar.gz", "archive.tgz", "archive.tar.bz2", "archive.tbz2", "archive.tar.zst"]
+
+
+@pytest.fixture(scope="module")
+def compressed_corpora(tmp_path_factory):
+    """
+    The same bundle in every container and compression `iter_articles` reads, and its articles
+    """
+    import bz2
+    import io
+    import tarfile
+    from index import _rewrite_blocked
+
+    tmp_path = tmp_path_factory.mktemp("compressed")
+    path = synthetic.write_corpus(str(tmp_path / "bundle.xml"), 20, seed=9)
+    with open(path, "rb") as f:
+        data = f.read()
+
+    tarred = io.BytesIO()
+    with tarfile.open(fileobj=tarred, mode="w") as archive:
+        info = tarfile.TarInfo("PMC000/bundle.xml")
+        info.size = len(data)
+        archive.addfile(info, io.BytesIO(data))
+    tarred = tarred.getvalue()
+
+    for name in COMPRESSED:
+        raw = tarred if name.startswith("archive") else data
+        if name.endswith((".gz", ".gzip", ".tgz")):
+            with gzip.open(str(tmp_path / name), "wb") as f:
+                f.write(raw)
+        elif name.endswith((".bz2", ".tbz2")):
+            with bz2.open(str(tmp_path / name), "wb") as f:
+                f.write(raw)
+        elif name.endswith(".zst"):
+            try:
+                import zstandard
+            except ImportError:
+                continue
+            (tmp_path / name).write_bytes(zstandard.ZstdCompressor().compress(raw))
+        else:
+            (tmp_path / name).write_bytes(raw)
+    _rewrite_blocked(str(tmp_path / "bundle.xml.gz"), str(tmp_path / "bundle.blocked.xml.gz"))
+
+    return tmp_path, [a.to_bytes() for a in iter_articles(path)]
+
+
+@pytest.mark.parametrize("threads", [0, 2])
+@pytest.mark.parametrize("name", COMPRESSED)
+def test_compressed_sources(compressed_corpora, name, threads):
+    import blockgzip
+
+    tmp_path, expected = compressed_corpora
+    path = str(tmp_path / name)
+    if not os.path.exists(path):
+        pytest.skip("requires zstandard")
+    assert blockgzip.is_blocked(path) is (name == "bundle.blocked.xml.gz")
+
+    articles = list(iter_articles(path, with_path=True, threads=threads))
+    assert len(articles) == 20
+    assert [a.to_bytes() for _, a in articles] == expected
+    assert {p for p, _ in articles} == {"PMC000/bundle.xml" if name.startswith("archive") else path}
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+@pytest.mark.parametrize("split", [False, True])
+def test_parse_many(tmp_path, ordered, split):
+    import io
+    from pubmedpy import WorkerStats, _iter_article_chunks, _iter_xml_sources, parse_many
+
+    paths = [synthetic.write_corpus(str(tmp_path / "bundle{}.xml.gz".format(i)), 12, seed=i) for i in range(3)]
+    paths.append(synthetic.write_corpus(str(tmp_path / "archive.tar.gz"), 5, seed=3))
+    expected = [(path, a.to_bytes()) for p in paths for path, a in iter_articles(p, with_path=True)]
+
+    stats = WorkerStats()
+    articles = [(path, a.to_bytes()) for path, a in parse_many(paths, workers=2, ordered=ordered, split=split,
+                                                               batch_size=5, with_path=True, stats=stats)]
+    assert articles == expected if ordered else sorted(articles) == sorted(expected)
+
+    assert sum(w["articles"] for w in stats.workers.values()) == len(expected)
+    # decompressed bytes of the xml documents, or of their articles when split
+    sources = [f.read() for p in paths for _, f in _iter_xml_sources(p)]
+    chunks = [c for data in sources for _, c in _iter_article_chunks(io.BytesIO(data))]
+    total = sum(w["bytes"] for w in stats.workers.values())
+    assert total == sum(map(len, chunks if split else sources))
+    assert total > .95 * sum(map(len, sources))
+    assert all(articles_s > 0 and mb_s > 0 for articles_s, mb_s in stats.throughput().values())
+
+
+def test_write_jsonl(tmp_path):
+    import io
+    import json
+    from pubmedpy import write_jsonl
+
+    archives = [synthetic.write_corpus(str(tmp_path / "archive{}.tar.gz".format(i)), 2, seed=0) for i in range(2)]
+    bundle = synthetic.write_corpus(str(tmp_path / "bundle.xml.gz"), 2, seed=1)
+    out = io.StringIO()
+    assert write_jsonl([str(tmp_path / "archive*.tar.gz"), bundle], out, ["ids"]) == 6
+
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    members = ["PMC{0}/PMC{1}.nxml".format(pmcid[:3], pmcid) for pmcid, _ in synthetic.iter_generated(2, seed=0)]
+    assert [(r["source"], r["member"]) for r in records] == \
+        [(archives[0], m) for m in members] + [(archives[1], m) for m in members] + [(bundle, None)] * 2
+    assert [r["pmcid"] for r in records[:2]] == [r["pmcid"] for r in records[2:4]]
+    with pytest.raises(ValueError):
+        write_jsonl([bundle], out, ["ids", "doi"])
@@ -0,0 +1,36 @@
+import gzip
+
+import pytest
+
+from pubmedpy import iter_articles
+import synthetic
+
+SHAPE = {"sections": 2, "paragraphs": 2, "table_rows": 4}
+
+
+@pytest.mark.parametrize("name", ["single.xml", "bundle.xml", "bundle.xml.gz", "archive.tar.gz"])
+def test_round_trip(tmp_path, name):
+    n = 1 if name == "single.xml" else 12
+    path = synthetic.write_corpus(str(tmp_path / name), n, seed=7, **SHAPE)
+    generated = list(synthetic.iter_generated(n, seed=7, **SHAPE))
+
+    articles = list(iter_articles(path, with_path=True))
+    assert [a.front.article_meta.pmcid for _, a in articles] == [pmcid for pmcid, _ in generated]
+    assert all(a.get_title() and a.get_flat_text() and a.get_tables() and a.get_authors() for _, a in articles)
+    if name.endswith(".tar.gz"):
+        assert [p for p, _ in articles] == ["PMC{}/PMC{}.nxml".format(pmcid[:3], pmcid) for pmcid, _ in generated]
+    assert [a.xml.get("article-type") for _, a in articles] == [a.type for _, a in articles]
+
+
+@pytest.mark.parametrize("names", [("a.xml.gz", "b.xml.gz"), ("a.tar.gz", "b.tgz"), ("a.xml", "b.xml")])
+def test_deterministic(tmp_path, names):
+    first, second = (synthetic.write_corpus(str(tmp_path / name), 5, seed=2, **SHAPE) for name in names)
+    with open(first, "rb") as a, open(second, "rb") as b:
+        assert a.read() == b.read()
+    if names[0].endswith(".gz"):
+        with gzip.open(first) as f:
+            assert f.read()
+    # a corpus is a prefix of any larger corpus with the same seed
+    assert list(synthetic.iter_generated(3, seed=2)) == list(synthetic.iter_generated(5, seed=2))[:3]
+    with pytest.raises(ValueError):
+        synthetic.generate_article(0, tabels=2)